@@ -1,42 +1,80 @@
 import logging
+from datetime import datetime
 
-from aiogram import F, Router
-from aiogram.types import Message, CallbackQuery
+from aiogram import Bot, F, Router
+from aiogram.types import BufferedInputFile, Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
+from aiogram.utils.callback_answer import CallbackAnswer
 
 from utils.db.main import Database
-from utils.parser import Parser
+from utils.ingest import IngestCoordinator
+from utils.scheduling import AdaptiveParserScheduler
+from utils.message_fingerprints import MessageFingerprints
+from utils.bot_session import BULK, INTERACTIVE, RateLimitedSession
+from utils.usage import UsageTracker
+from utils.profiler import LoopLagWatchdog, LoopProfiler, ProfilerBusyError
 
 from keyboards.builders import inline_builder, kb_admin_panel
+from keyboards.callback_data import ParserModeCallback, ProfilerCallback
 
 
 router = Router()
 
+# Режимы парсера, которые предлагает админка (0 — адаптивный)
+PARSER_MODES = (('Авто', 0), ('30 мин', 30), ('2 ч', 120))
+
+
+async def is_admin(callback_query: CallbackQuery, db: Database) -> bool:
+    return await db.get_role(callback_query.from_user.id) == 'admin'
+
+
+# Длительности профилирования, с
+PROFILER_DURATIONS = (10, 30, 60)
+
+# Все обработчики админки доступны только администраторам
+router.callback_query.filter(is_admin)
+
 
 @router.callback_query(F.data.in_('admin_panel'))
-async def admin_panel(callback_query: CallbackQuery):
+async def admin_panel(callback_query: CallbackQuery, ingest: IngestCoordinator):
+    text = 'О, босс на месте.\nДавай по-быстрому решим, кто тут главный.'
+    if ingest.running:
+        text += '\n\nОбновление расписания выполняется...'
+    if ingest.last_result:
+        text += f'\n\nПоследнее обновление:\n{ingest.last_result.describe()}'
+
     await callback_query.message.edit_text(
-        text='О, босс на месте.\nДавай по-быстрому решим, кто тут главный.',
+        text=text,
         reply_markup=kb_admin_panel
     )
 
 
-@router.callback_query(F.data.in_('update_schedule'))
+# Долгие обработчики отвечают до начала работы, результат показывают в сообщении панели
+@router.callback_query(
+    F.data.in_('update_schedule'),
+    flags={'callback_answer': {'pre': True, 'text': 'Обновляю расписание...'}}
+)
 async def update_schedules(
     callback_query: CallbackQuery,
-    db: Database
+    ingest: IngestCoordinator
 ):
-    parser = Parser()
-    await parser.get_schedule()
-    await parser.save_db_data(db)
+    result = await ingest.run('admin')
+    texts = {
+        'ok': 'Успешно обновлено.',
+        'error': 'Ошибка при обновлении.',
+        'busy': 'Обновление уже выполняется в другом процессе.'
+    }
 
-    await callback_query.answer(
-        text='Успешно обновлено.',
+    await callback_query.message.edit_text(
+        text=f'{texts.get(result.status, result.status)}\n\n{result.describe()}',
         reply_markup=kb_admin_panel
     )
 
 
-@router.callback_query(F.data.in_('invalidate_cache'))
+@router.callback_query(
+    F.data.in_('invalidate_cache'),
+    flags={'callback_answer': {'pre': True, 'text': 'Очищаю кэш...'}}
+)
 async def invalidate_cache_all(
     callback_query: CallbackQuery,
     db: Database
@@ -46,20 +84,212 @@ async def invalidate_cache_all(
     await db.clear_cache(user_id)
     await db.clear_cache_schedule()
 
-    await callback_query.answer(
+    await callback_query.message.edit_text(
         text='Кэш успешно удален.',
         reply_markup=kb_admin_panel
     )
 
 
+@router.callback_query(F.data == 'cache_stats')
+async def cache_stats(
+    callback_query: CallbackQuery,
+    bot: Bot,
+    db: Database,
+    fingerprints: MessageFingerprints
+) -> None:
+    lines = [
+        f"{name}: {stats['hits']} hit / {stats['stale_hits']} stale / "
+        f"{stats['misses']} miss, обновлений {stats['refreshes']}, записей {stats['size']}"
+        for name, stats in db.get_cache_stats().items()
+    ]
+
+    edits = fingerprints.info()
+    lines.append(
+        f"\nЗапросов к Bot API сэкономлено: {edits['saved']} "
+        f"(правок {edits['edits_skipped']}, ответов {edits['answers_skipped']}), "
+        f"\"not modified\": {edits['not_modified']}, "
+        f"потеряно ответов с текстом: {edits['answers_lost']}"
+    )
+
+    if isinstance(bot.session, RateLimitedSession):
+        session = bot.session.info()
+        lines.append(f"\nИсходящие запросы (повторов после 429: {session['retries']}):")
+        for priority, name in ((INTERACTIVE, 'ответы'), (BULK, 'рассылки')):
+            stats = session[priority]
+            lines.append(
+                f"{name}: в очереди {stats['queue']}, всего {stats['requests']}, "
+                f"ожидание ср. {stats['wait_avg']:.2f} / макс. {stats['wait_max']:.2f} с"
+            )
+
+    replica = db.get_replica_stats()
+    if replica['enabled']:
+        lag = f"{replica['lag']:.1f} с" if replica['lag'] is not None else 'нет данных'
+        lines.append(
+            f"\nРеплика: {'работает' if replica['healthy'] else 'отключена'}, отставание {lag}\n"
+            f"Чтений: реплика {replica['replica']} / primary {replica['primary']}, "
+            f"переключений на primary {replica['fallbacks']}"
+        )
+
+    await callback_query.message.edit_text(
+        text='Статистика кэша:\n\n' + '\n'.join(lines),
+        reply_markup=inline_builder(text='Назад', callback_data='admin_panel')
+    )
+
+
+@router.callback_query(F.data == 'usage_stats')
+async def usage_stats(
+    callback_query: CallbackQuery,
+    db: Database,
+    usage: UsageTracker
+) -> None:
+    # Сначала пишем накопленное, чтобы сводка была актуальной
+    await usage.flush()
+    summary = await db.get_usage_summary(days=7)
+
+    groups = '\n'.join(
+        f"{record['group_name']}: {record['requests']}" for record in summary['top_groups']
+    ) or 'нет данных'
+    hours = ', '.join(
+        f"{record['hour']:02d}:00 ({record['requests']})" for record in summary['peak_hours']
+    ) or 'нет данных'
+
+    await callback_query.message.edit_text(
+        text=(
+            'Активность за 7 дней.\n\n'
+            f"Активных пользователей: {summary['active_day']} за сутки, {summary['active_period']} за неделю\n\n"
+            f'Популярные группы:\n{groups}\n\n'
+            f'Часы пик: {hours}'
+        ),
+        reply_markup=inline_builder(text='Назад', callback_data='admin_panel')
+    )
+
+
+@router.callback_query(F.data == 'profiler')
+async def profiler_menu(
+    callback_query: CallbackQuery,
+    profiler: LoopProfiler,
+    watchdog: LoopLagWatchdog | None
+) -> None:
+    text = 'Профилирование потока цикла событий (cProfile).'
+    if profiler.running:
+        text += '\n\nПрофилирование уже идёт.'
+    if watchdog is not None:
+        info = watchdog.info()
+        text += (
+            f"\n\nБлокировок цикла дольше {info['threshold']} с: {info['stalls']}, "
+            f"максимальная задержка {info['max_lag']:.2f} с (стеки в логе)."
+        )
+
+    durations = PROFILER_DURATIONS
+    await callback_query.message.edit_text(
+        text=text,
+        reply_markup=inline_builder(
+            text=[f'{seconds} с' for seconds in durations] + ['Назад'],
+            callback_data=[
+                ProfilerCallback(seconds=seconds).pack() for seconds in durations
+            ] + ['admin_panel'],
+            sizes=[len(durations), 1]
+        )
+    )
+
+
+@router.callback_query(ProfilerCallback.filter())
+async def run_profiler(
+    callback_query: CallbackQuery,
+    callback_data: ProfilerCallback,
+    callback_answer: CallbackAnswer,
+    bot: Bot,
+    profiler: LoopProfiler
+) -> None:
+    if callback_data.seconds not in PROFILER_DURATIONS:
+        callback_answer.text = 'Эта длительность недоступна.'
+        callback_answer.show_alert = True
+        return
+    if profiler.running:
+        callback_answer.text = 'Профилирование уже идёт.'
+        callback_answer.show_alert = True
+        return
+
+    # Профилирование идёт секундами: отвечаем сразу, а не после обработчика
+    callback_answer.disable()
+    await callback_query.answer(f'Профилирую {callback_data.seconds} с...')
+    try:
+        summary, data = await profiler.run(callback_data.seconds)
+    except ProfilerBusyError:
+        return
+
+    chat_id = callback_query.from_user.id
+    await bot.send_message(chat_id, summary[:4000])
+    await bot.send_document(
+        chat_id,
+        BufferedInputFile(data, filename=f"profile_{datetime.now():%Y%m%d_%H%M%S}.prof"),
+        caption='Открыть: python -m pstats, snakeviz'
+    )
+
+
+async def send_parser_mode(
+    callback_query: CallbackQuery,
+    db: Database,
+    parser_scheduler: AdaptiveParserScheduler | None
+) -> None:
+    if parser_scheduler is not None:
+        text = parser_scheduler.describe()
+    else:
+        override = await AdaptiveParserScheduler.get_saved_override(db)
+        mode = f'каждые {int(override.total_seconds() // 60)} мин' if override else 'авто'
+        text = f'Режим: {mode}\nПланировщик работает в другом процессе, режим применяется в нём.'
+
+    await callback_query.message.edit_text(
+        text=text,
+        reply_markup=inline_builder(
+            text=[m[0] for m in PARSER_MODES] + ['Назад'],
+            callback_data=[
+                ParserModeCallback(minutes=m[1]).pack() for m in PARSER_MODES
+            ] + ['admin_panel'],
+            sizes=[3, 1]
+        )
+    )
+
+
+@router.callback_query(F.data == 'parser_mode')
+async def parser_mode(
+    callback_query: CallbackQuery,
+    db: Database,
+    parser_scheduler: AdaptiveParserScheduler | None
+) -> None:
+    await send_parser_mode(callback_query, db, parser_scheduler)
+
+
+@router.callback_query(ParserModeCallback.filter())
+async def set_parser_mode(
+    callback_query: CallbackQuery,
+    callback_data: ParserModeCallback,
+    callback_answer: CallbackAnswer,
+    db: Database,
+    parser_scheduler: AdaptiveParserScheduler | None
+) -> None:
+    if callback_data.minutes not in {m[1] for m in PARSER_MODES}:
+        callback_answer.text = 'Этот режим недоступен.'
+        callback_answer.show_alert = True
+        return
+
+    minutes = callback_data.minutes or None
+    await AdaptiveParserScheduler.save_override(db, minutes)
+    if parser_scheduler is not None:
+        parser_scheduler.set_override(minutes)
+    callback_answer.text = 'Режим парсера изменён.'
+    await send_parser_mode(callback_query, db, parser_scheduler)
+
+
 @router.callback_query(F.data.in_('get_support_message'))
 async def get_support_messages(
     callback_query: CallbackQuery, 
+    callback_answer: CallbackAnswer,
     db: Database
 ) -> None:
     support_messages = await db.get_support_messages()
     
     if support_messages:
-        await callback_query.answer("Сообщения поддержки: \n" + "\n".join(support_messages))
+        callback_answer.text = "Сообщения поддержки: \n" + "\n".join(support_messages)
     else:
-        await callback_query.answer("Нет сообщений поддержки.")
+        callback_answer.text = "Нет сообщений поддержки."
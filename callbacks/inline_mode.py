@@ -0,0 +1,25 @@
+from aiogram import Router
+from aiogram.types import InlineQuery
+
+from utils.db.main import Database
+from utils.inline_index import InlineIndex
+
+
+router = Router()
+
+# Сколько секунд Telegram может отдавать ответ на тот же запрос из своего кэша
+INLINE_CACHE_TIME = 300
+
+
+@router.inline_query()
+async def inline_schedule(
+    inline_query: InlineQuery,
+    db: Database,
+    inline_index: InlineIndex
+) -> None:
+    results = inline_index.search(inline_query.query, db.snapshot, db.data_version)
+    await inline_query.answer(
+        results,
+        cache_time=INLINE_CACHE_TIME,
+        is_personal=False
+    )
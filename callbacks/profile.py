@@ -1,15 +1,22 @@
 import logging
-from datetime import datetime
+from datetime import datetime, time
 
 from aiogram import F, Router
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
+from aiogram.utils.callback_answer import CallbackAnswer
 
 from utils.db.main import Database
 
 from utils.states import EditName, EditGroupName
 from keyboards.builders import inline_builder, kb_groups
 from keyboards.inline import kb_back_profile
+from keyboards.callback_data import GroupCallback, DigestCallback
+from utils.digest import DIGEST_TIMES
+from utils.feeds import feed_url
+
+
+logger = logging.getLogger(__name__)
 
 
 router = Router()
@@ -19,46 +26,57 @@ async def send_profile(
     user_id: int,
     db: Database,
     message: Message = None,
-    callback_query: CallbackQuery = None
+    callback_query: CallbackQuery = None,
+    callback_answer: CallbackAnswer = None
 ) -> None:
     """
     Универсальная функция для отображения профиля пользователя.
-    Может вызываться как из Message, так и из CallbackQuery.
+    Может вызываться как из Message, так и из CallbackQuery
+    (тогда ошибка показывается через callback_answer).
     """
     try:
         data = await db.get_user_info(user_id)
     except Exception as e:
-        logging.error(f"Ошибка при получении информации пользователя: {e}")
+        logger.error("Ошибка при получении информации пользователя: %s", e)
         error_text = "Ошибка при получении профиля."
-        if callback_query:
-            await callback_query.answer(error_text, show_alert=True)
+        if callback_answer:
+            callback_answer.text = error_text
+            callback_answer.show_alert = True
         elif message:
             await message.answer(error_text)
         return
 
     username = (message.from_user.username if message else callback_query.from_user.username)
-    logging.debug(f"Полученные данные профиля: {data}")
+    logger.debug("Полученные данные профиля: %s", data)
 
     date_str = data.get("signup_date", "неизвестно").strftime('%d.%m.%Y') if isinstance(data.get("signup_date"), datetime) else "неизвестно"
+    digest_time = data.get("digest_time")
     text = (
         f'Пользователь, @{username}\n'
         f'Группа: {data.get("group_name", "не указана")}\n'
-        f'Дата регистрации: {date_str}'
+        f'Дата регистрации: {date_str}\n'
+        f'Рассылка расписания: {digest_time.strftime("%H:%M") if digest_time else "выключена"}'
     )
 
+    groups = {group['group_name']: group['group_id'] for group in await db.get_groups_name()}
+    url = feed_url(groups[data["group_name"]]) if data.get("group_name") in groups else None
+    if url:
+        text += f'\nКалендарь: {url}'
+
     buttons = [
         ('Тех. поддержка', 'support'),
         ('Изменить группу', 'update_group'),
+        ('Рассылка', 'digest'),
         ('Назад', 'back_main')
     ]
 
     if data.get("role") == 'admin':
-        buttons.insert(2, (f'Админка', 'admin_panel'))
+        buttons.insert(3, (f'Админка', 'admin_panel'))
 
     btn = inline_builder(
         text=[b[0] for b in buttons],
         callback_data=[b[1] for b in buttons],
-        sizes=[2, 1, 1]
+        sizes=[2, 1, 1, 1]
     )
 
     if callback_query:
@@ -68,16 +86,20 @@ async def send_profile(
 
 
 @router.callback_query(F.data.in_(['profile', 'back_profile']))
-async def profile(callback_query: CallbackQuery, db: Database) -> None:
+async def profile(callback_query: CallbackQuery, callback_answer: CallbackAnswer, db: Database) -> None:
     """
     Обработчик для отображения профиля через CallbackQuery.
     """
-    await send_profile(callback_query.from_user.id, db, callback_query=callback_query)
+    await send_profile(
+        callback_query.from_user.id, db,
+        callback_query=callback_query, callback_answer=callback_answer
+    )
 
 
 @router.callback_query(F.data.in_('update_group'))
 async def update_group_name(
     callback_query: CallbackQuery, 
+    callback_answer: CallbackAnswer,
     db: Database, 
     state: FSMContext
 ) -> None:
@@ -88,28 +110,86 @@ async def update_group_name(
     try:
         group_name = await db.get_groups_name()
     except Exception as e:
-        logging.error(f"Ошибка при получении списка групп: {e}")
-        await callback_query.answer("Ошибка при получении списка групп.", show_alert=True)
+        logger.error("Ошибка при получении списка групп: %s", e)
+        callback_answer.text = "Ошибка при получении списка групп."
+        callback_answer.show_alert = True
         return
 
     await callback_query.message.edit_text(
         text='Выберите группу:',
-        reply_markup=kb_groups(group_name)
+        reply_markup=kb_groups(group_name, db.data_version)
     )
     await state.set_state(EditGroupName.group_name)
 
 
-@router.callback_query(EditGroupName.group_name, F.data)
+@router.callback_query(EditGroupName.group_name, GroupCallback.filter())
 async def get_group_name(
     callback_query: CallbackQuery, 
+    callback_data: GroupCallback,
+    callback_answer: CallbackAnswer,
     state: FSMContext, 
     db: Database
 ) -> None:
     """
     Обрабатывает выбор группы пользователем, обновляет группу в базе и отображает профиль.
     """
+    group = await db.get_group_name_by_id(callback_data.group_id)
+    if group is None:
+        # Устаревшая клавиатура: группы с таким id больше нет в списке
+        callback_answer.text = 'Такой группы нет, выберите из списка.'
+        callback_answer.show_alert = True
+        await callback_query.message.edit_reply_markup(
+            reply_markup=kb_groups(await db.get_groups_name(), db.data_version)
+        )
+        return
+
     await state.clear()
-    group = callback_query.data
     user_id = callback_query.from_user.id
     await db.update_group(user_id, group)
-    await send_profile(user_id, db, callback_query=callback_query)
\ No newline at end of file
+    await send_profile(user_id, db, callback_query=callback_query, callback_answer=callback_answer)
+
+@router.callback_query(F.data == 'digest')
+async def digest_settings(callback_query: CallbackQuery) -> None:
+    """
+    Показывает выбор времени ежедневной рассылки расписания на завтра.
+    """
+    buttons = [
+        (digest_time.strftime('%H:%M'), DigestCallback(minutes=digest_time.hour * 60 + digest_time.minute).pack())
+        for digest_time in DIGEST_TIMES
+    ]
+    buttons += [
+        ('Выключить', DigestCallback(minutes=-1).pack()),
+        ('Назад', 'profile')
+    ]
+
+    await callback_query.message.edit_text(
+        text='Во сколько присылать расписание на завтра?',
+        reply_markup=inline_builder(
+            text=[b[0] for b in buttons],
+            callback_data=[b[1] for b in buttons],
+            sizes=[len(DIGEST_TIMES), 1, 1]
+        )
+    )
+
+
+@router.callback_query(DigestCallback.filter())
+async def set_digest_time(
+    callback_query: CallbackQuery,
+    callback_data: DigestCallback,
+    callback_answer: CallbackAnswer,
+    db: Database
+) -> None:
+    """
+    Сохраняет время рассылки и возвращает в профиль.
+    """
+    digest_time = None
+    if callback_data.minutes >= 0:
+        digest_time = time(callback_data.minutes // 60, callback_data.minutes % 60)
+        if digest_time not in DIGEST_TIMES:
+            callback_answer.text = 'Это время недоступно.'
+            callback_answer.show_alert = True
+            return
+
+    user_id = callback_query.from_user.id
+    await db.update_digest_time(user_id, digest_time)
+    await send_profile(user_id, db, callback_query=callback_query, callback_answer=callback_answer)
@@ -1,14 +1,19 @@
-import json
-
 from aiogram import F, Router
 from aiogram.types import Message, CallbackQuery
-from datetime import datetime, timedelta
+from aiogram.utils.callback_answer import CallbackAnswer
+from datetime import date, datetime, timedelta
 
 from typing import Any, Dict, List
 
 from utils.db.main import Database
+from utils.db.data_loader import DataLoader
+from utils.formatting import format_schedule, format_week
 
-from keyboards.builders import inline_builder, kb_groups
+from keyboards.builders import inline_builder, kb_groups, kb_other_groups, kb_schedule_dates, kb_week
+from keyboards.callback_data import (
+    ScheduleCallback, OtherGroupsCallback, EditDateCallback, AlertCallback, WeekCallback,
+    date_to_day, week_start
+)
 
 
 router = Router()
@@ -25,32 +30,29 @@ def get_date():
 
 async def send_schedule_data(
     callback_query: CallbackQuery,
-    schedule_data: Dict[str, Any]
+    callback_answer: CallbackAnswer,
+    schedule_data: Dict[str, Any],
+    group_id: int | None = None
 ):
-    size = [2,1]
+    size = [2,1,1]
 
     if not schedule_data:
-        await callback_query.answer('Нету расписания ;(')
+        callback_answer.text = 'Нету расписания ;('
         return
 
-    pair_data = ''
-    for pair in json.loads(schedule_data['subjects']):
-        pair_data += f"{pair['subject_number']}. {pair['subject_name']} - {pair['room_number']}\n" \
-                     f"Преподаватель: {pair['teacher']}\n\n"
+    text = format_schedule(schedule_data)
 
-    text = f'Расписание на {schedule_data["date"]} ({schedule_data["weekday"]}).\n\n' \
-           f'Группа - {schedule_data["group_name"]}\n' \
-           f'Начало в {schedule_data["start_at"]}\n\n' \
-           f'{pair_data}'
-    
+    day = date_to_day(schedule_data["date"])
     buttons = [
-        ('Что у других?', f'view_other_group_schedule|{schedule_data["date"]}'), ('Другая дата', f'schedule_edit_date|{schedule_data["date"]}'),
+        ('Что у других?', OtherGroupsCallback(day=day).pack()),
+        ('Другая дата', EditDateCallback(day=day).pack()),
+        ('Неделя', WeekCallback(day=date_to_day(week_start(schedule_data["date"])), group_id=group_id).pack()),
         ('Назад', 'back_main')
     ]
 
     if schedule_data["alert"]:
-        buttons.insert(0, ('Доп. информация', f'schedule_alert|{schedule_data["date"]}'))
-        size = [1,2,1]
+        buttons.insert(0, ('Доп. информация', AlertCallback(day=day).pack()))
+        size = [1,2,1,1]
 
     pattern = dict(
         text=text,
@@ -64,103 +66,107 @@ async def send_schedule_data(
     await callback_query.message.edit_text(**pattern)
 
 
-@router.callback_query(F.data.startswith('view_other_group_schedule'))
-async def view_other_group_schedule(callback_query: CallbackQuery, db: Database):
-    str_date = callback_query.data.split('|')[-1]
-    date = datetime.strptime(str_date, '%Y-%m-%d').date()
-
+@router.callback_query(OtherGroupsCallback.filter())
+async def view_other_group_schedule(
+    callback_query: CallbackQuery,
+    callback_data: OtherGroupsCallback,
+    db: Database
+):
     groups = await db.get_groups_name()
 
-    buttons = [
-        (record['group_name'], f'view_schedule_for_group|{record["group_name"]}|{str_date}')
-        for record in groups
-    ]
-    buttons.append(('Назад', f'schedules|{str_date}'))
-
     await callback_query.message.edit_reply_markup(
-        reply_markup=inline_builder(
-            text=[b[0] for b in buttons],
-            callback_data=[b[1] for b in buttons],
-            sizes=3
-        )
+        reply_markup=kb_other_groups(groups, callback_data.day, db.data_version)
     )
 
 
-@router.callback_query(F.data.startswith('view_schedule_for_group'))
-async def view_schedule_for_group(callback_query: CallbackQuery, db: Database):
-    _, group_name, str_date = callback_query.data.split('|')
-    date = datetime.strptime(str_date, '%Y-%m-%d').date()
-
-    schedule_data = await db.get_schedule_by_group(group_name, date)
-
-    await send_schedule_data(
-        callback_query=callback_query,
-        schedule_data=schedule_data
-    )
-
-
-@router.callback_query(F.data.startswith('schedule_alert'))
-async def schedule_edit_date(
+@router.callback_query(AlertCallback.filter())
+async def schedule_alert(
     callback_query: CallbackQuery,
+    callback_data: AlertCallback,
     db: Database
 ):
-    str_date = callback_query.data.split('|')[-1]
-    date = datetime.strptime(str_date, '%Y-%m-%d').date()
-
-    alert = await db.get_schedule_alert(date)
+    alert = await db.get_schedule_alert(callback_data.date)
     await callback_query.message.edit_text(
-        text=alert, 
+        text=alert,
         reply_markup=inline_builder(
-            text='Назад', 
-            callback_data=f'schedules|{str_date}'
+            text='Назад',
+            callback_data=ScheduleCallback(day=callback_data.day).pack()
         )
     )
 
 
-@router.callback_query(F.data.startswith('schedule_edit_date'))
+@router.callback_query(EditDateCallback.filter())
 async def schedule_edit_date(
     callback_query: CallbackQuery,
+    callback_data: EditDateCallback,
     db: Database
 ):
     date_list = await db.get_schedule_date()
 
-    date = callback_query.data.split('|')[-1]
-
-    buttons = [
-        (
-            f"{date['date'].strftime('%Y-%m-%d')} ({date['date'].strftime('%A')})", 
-            f'schedules|{date["date"].strftime("%Y-%m-%d")}'
-        ) 
-        for date in date_list
-    ]
-    buttons.append(('Назад', f'schedules|{date}'))
-
     await callback_query.message.edit_reply_markup(
-        reply_markup=inline_builder(
-            text=[b[0] for b in buttons],
-            callback_data=[b[1] for b in buttons],
-            sizes=1
-        )
+        reply_markup=kb_schedule_dates(date_list, callback_data.day, db.data_version)
     )
 
 
-@router.callback_query(F.data.startswith('schedules'))
+@router.callback_query(F.data == 'schedules')
+@router.callback_query(ScheduleCallback.filter())
 async def get_schedules(
-    callback_query: CallbackQuery, 
-    db: Database
+    callback_query: CallbackQuery,
+    callback_answer: CallbackAnswer,
+    db: Database,
+    loader: DataLoader,
+    callback_data: ScheduleCallback | None = None
 ):
     user_id = callback_query.from_user.id
-    
-    date = callback_query.data.split('|')[-1] if '|' in callback_query.data else get_date()
 
-    if callback_query.data.count('|') == 2: group_name = callback_query.data.split('|')[-2]
-    else: group_name = await db.get_group(user_id)
+    if callback_data is None or callback_data.group_id is None:
+        date = callback_data.date if callback_data else get_date()
+        _, schedule_data = await loader.get_user_schedule(user_id, date)
+    else:
+        group_name = await db.get_group_name_by_id(callback_data.group_id)
+        schedule_data = await loader.get_schedule(group_name, callback_data.date)
 
-    if isinstance(date, str):
-        date = datetime.strptime(date, '%Y-%m-%d').date()
-
-    schedule_data = await db.get_schedule_by_group(group_name, date)
     await send_schedule_data(
         callback_query=callback_query,
-        schedule_data=schedule_data
-    )
\ No newline at end of file
+        callback_answer=callback_answer,
+        schedule_data=schedule_data,
+        group_id=callback_data.group_id if callback_data else None
+    )
+
+
+@router.callback_query(WeekCallback.filter())
+async def get_week(
+    callback_query: CallbackQuery,
+    callback_answer: CallbackAnswer,
+    callback_data: WeekCallback,
+    db: Database,
+    loader: DataLoader
+):
+    if callback_data.group_id is None:
+        group_name = await loader.get_group(callback_query.from_user.id)
+    else:
+        group_name = await db.get_group_name_by_id(callback_data.group_id)
+
+    # Прошедшие дни недели не показываем: диапазон целиком берётся из снимка
+    today = date.today()
+    start = max(callback_data.date, today)
+    schedules = await db.get_schedule_range(group_name, start, callback_data.date + timedelta(days=6))
+
+    if not schedules:
+        callback_answer.text = 'Нету расписания на эту неделю ;('
+        return
+
+    dates = await db.get_schedule_date()
+    last_date = dates[-1]['date'] if dates else start
+
+    await callback_query.message.edit_text(
+        text=format_week(group_name, schedules),
+        reply_markup=kb_week(
+            day=callback_data.day,
+            group_id=callback_data.group_id,
+            back_day=date_to_day(schedules[0]['date']),
+            has_prev=callback_data.date > week_start(today),
+            has_next=callback_data.date + timedelta(days=7) <= last_date,
+            version=db.data_version
+        )
+    )
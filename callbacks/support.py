@@ -1,3 +1,5 @@
+import asyncio
+import logging
 from random import choice
 
 from aiogram import F, Router, Bot
@@ -7,11 +9,15 @@ from aiogram.utils.media_group import MediaGroupBuilder
 
 from utils.db.main import Database
 from utils.states import SupportMessage
+from utils.bot_session import bulk_priority
 
 from keyboards.inline import kb_back_profile, kb_skip
 from keyboards.builders import support_completed, inline_builder
 
 
+logger = logging.getLogger(__name__)
+
+
 router = Router()
 
 
@@ -109,10 +115,18 @@ async def support_complete(
         sizes=[1]
     )
 
-    for id in await db.get_admin_ids():
-        await bot.send_message(id['user_id'], 'Новое обращение!', reply_markup=btn)
-
     await callback_query.message.edit_text(
         text=text,
         reply_markup=kb_back_profile
-    )
\ No newline at end of file
+    )
+
+    admin_ids = [record['user_id'] for record in await db.get_admin_ids()]
+    with bulk_priority():
+        results = await asyncio.gather(*(
+            bot.send_message(admin_id, 'Новое обращение!', reply_markup=btn)
+            for admin_id in admin_ids
+        ), return_exceptions=True)
+
+    for admin_id, result in zip(admin_ids, results):
+        if isinstance(result, Exception):
+            logger.error("Не удалось уведомить администратора %s: %s", admin_id, result)
\ No newline at end of file
@@ -1,9 +1,65 @@
 from random import choice
 from datetime import datetime, date
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
 
+from aiogram.types import InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 from aiogram.filters.callback_data import CallbackData
 
+from keyboards.callback_data import GroupCallback, ScheduleCallback, WeekCallback, date_to_day
+
+
+class KeyboardCache:
+    """
+    Кэш готовых клавиатур по ключу (вид, дата, версия данных).
+    При смене версии данных все клавиатуры сбрасываются.
+    """
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.version: Hashable = None
+        self._data: OrderedDict[tuple, InlineKeyboardMarkup] = OrderedDict()
+
+    def get_or_build(
+        self,
+        kind: str,
+        context: Any,
+        version: Hashable,
+        build: Callable[[], InlineKeyboardMarkup]
+    ) -> InlineKeyboardMarkup:
+        if version != self.version:
+            self.invalidate(version)
+
+        key = (kind, context, version)
+        markup = self._data.get(key)
+        if markup is not None:
+            self._data.move_to_end(key)
+            return markup
+
+        markup = build()
+        self._data[key] = markup
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return markup
+
+    def invalidate(self, version: Hashable = None) -> None:
+        self._data.clear()
+        self.version = version
+
+    def dump(self) -> dict:
+        return {
+            'version': self.version,
+            'items': [(key, markup.model_dump()) for key, markup in self._data.items()]
+        }
+
+    def load(self, data: dict) -> None:
+        self.invalidate(data['version'])
+        for key, markup in data['items']:
+            self._data[key] = InlineKeyboardMarkup.model_validate(markup)
+
+
+keyboard_cache = KeyboardCache()
+
 
 def inline_builder(
     text: str | list[str],
@@ -55,12 +111,86 @@ def reply_builder(
     return builder.as_markup(**kwargs)
 
 
-def kb_groups(groups_name: list) -> InlineKeyboardBuilder:
-    return inline_builder(
-        text=groups_name,
-        callback_data=groups_name,
-        sizes=3,
-        groups=True
+def kb_groups(groups_name: list, version: Hashable = None) -> InlineKeyboardMarkup:
+    return keyboard_cache.get_or_build(
+        'groups', None, version,
+        lambda: inline_builder(
+            text=[data['group_name'] for data in groups_name],
+            callback_data=[
+                GroupCallback(group_id=data['group_id']).pack()
+                for data in groups_name
+            ],
+            sizes=3
+        )
+    )
+
+
+def kb_other_groups(groups_name: list, day: int, version: Hashable = None) -> InlineKeyboardMarkup:
+    def build() -> InlineKeyboardMarkup:
+        buttons = [
+            (
+                data['group_name'],
+                ScheduleCallback(day=day, group_id=data['group_id']).pack()
+            )
+            for data in groups_name
+        ]
+        buttons.append(('Назад', ScheduleCallback(day=day).pack()))
+
+        return inline_builder(
+            text=[b[0] for b in buttons],
+            callback_data=[b[1] for b in buttons],
+            sizes=3
+        )
+
+    return keyboard_cache.get_or_build('other_groups', day, version, build)
+
+
+def kb_schedule_dates(date_list: list, day: int, version: Hashable = None) -> InlineKeyboardMarkup:
+    def build() -> InlineKeyboardMarkup:
+        buttons = [
+            (
+                f"{data['date'].strftime('%Y-%m-%d')} ({data['date'].strftime('%A')})",
+                ScheduleCallback(day=date_to_day(data['date'])).pack()
+            )
+            for data in date_list
+        ]
+        buttons.append(('Назад', ScheduleCallback(day=day).pack()))
+
+        return inline_builder(
+            text=[b[0] for b in buttons],
+            callback_data=[b[1] for b in buttons],
+            sizes=1
+        )
+
+    # Первая доступная дата в ключе: после полуночи клавиатура пересобирается
+    first_date = date_list[0]['date'] if date_list else None
+    return keyboard_cache.get_or_build('dates', (day, first_date), version, build)
+
+
+def kb_week(
+    day: int,
+    group_id: int | None,
+    back_day: int,
+    has_prev: bool,
+    has_next: bool,
+    version: Hashable = None
+) -> InlineKeyboardMarkup:
+    def build() -> InlineKeyboardMarkup:
+        buttons = []
+        if has_prev:
+            buttons.append(('« Пред. неделя', WeekCallback(day=day - 7, group_id=group_id).pack()))
+        if has_next:
+            buttons.append(('След. неделя »', WeekCallback(day=day + 7, group_id=group_id).pack()))
+        buttons.append(('Назад', ScheduleCallback(day=back_day, group_id=group_id).pack()))
+
+        return inline_builder(
+            text=[b[0] for b in buttons],
+            callback_data=[b[1] for b in buttons],
+            sizes=[len(buttons) - 1, 1] if len(buttons) > 1 else 1
+        )
+
+    return keyboard_cache.get_or_build(
+        'week', (day, group_id, back_day, has_prev, has_next), version, build
     )
 
 
@@ -81,12 +211,16 @@ kb_admin_panel = inline_builder(
     text=[
         'Пользователи', 'Уведомления',
         'Сбросить кэш', 'Обновить расписание',
+        'Статистика кэша', 'Режим парсера',
+        'Активность', 'Профилировщик',
         'Назад'
     ],
     callback_data=[
         'admin_users', 'admin_notif',
         'invalidate_cache', 'update_schedule',
+        'cache_stats', 'parser_mode',
+        'usage_stats', 'profiler',
         'back_profile'
     ],
-    sizes=[2,2,1]
+    sizes=[2,2,2,2,1]
 )
\ No newline at end of file
@@ -0,0 +1,114 @@
+from datetime import date, timedelta
+from typing import Optional
+
+from aiogram.filters.callback_data import CallbackData
+
+
+# Точка отсчёта для компактной записи дат в callback_data
+EPOCH = date(2024, 1, 1)
+
+
+def date_to_day(value: date) -> int:
+    """
+    Переводит дату в количество дней от EPOCH.
+    """
+    return (value - EPOCH).days
+
+
+def day_to_date(day: int) -> date:
+    """
+    Переводит количество дней от EPOCH обратно в дату.
+    """
+    return EPOCH + timedelta(days=day)
+
+
+def week_start(value: date) -> date:
+    """
+    Возвращает понедельник недели, в которую попадает дата.
+    """
+    return value - timedelta(days=value.weekday())
+
+
+class GroupCallback(CallbackData, prefix='g'):
+    """
+    Выбор группы при регистрации и смене группы.
+    """
+    group_id: int
+
+
+class ScheduleCallback(CallbackData, prefix='s'):
+    """
+    Просмотр расписания. Без group_id — группа пользователя.
+    """
+    day: int
+    group_id: Optional[int] = None
+
+    @property
+    def date(self) -> date:
+        return day_to_date(self.day)
+
+
+class WeekCallback(CallbackData, prefix='w'):
+    """
+    Расписание на неделю, day — понедельник недели. Без group_id — группа пользователя.
+    """
+    day: int
+    group_id: Optional[int] = None
+
+    @property
+    def date(self) -> date:
+        return day_to_date(self.day)
+
+
+class OtherGroupsCallback(CallbackData, prefix='og'):
+    """
+    Список групп для просмотра расписания на дату.
+    """
+    day: int
+
+    @property
+    def date(self) -> date:
+        return day_to_date(self.day)
+
+
+class EditDateCallback(CallbackData, prefix='ed'):
+    """
+    Выбор другой даты.
+    """
+    day: int
+
+    @property
+    def date(self) -> date:
+        return day_to_date(self.day)
+
+
+class AlertCallback(CallbackData, prefix='al'):
+    """
+    Дополнительная информация на дату.
+    """
+    day: int
+
+    @property
+    def date(self) -> date:
+        return day_to_date(self.day)
+
+
+class DigestCallback(CallbackData, prefix='dg'):
+    """
+    Время ежедневной рассылки в минутах от полуночи (-1 — выключить).
+    """
+    minutes: int
+
+
+class ParserModeCallback(CallbackData, prefix='pm'):
+    """
+    Интервал запуска парсера в минутах (0 — адаптивный режим).
+    """
+    minutes: int
+
+
+class ProfilerCallback(CallbackData, prefix='pf'):
+    """
+    Длительность профилирования в секундах.
+    """
+    seconds: int
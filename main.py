@@ -1,42 +1,58 @@
 import asyncio
 import logging
+import multiprocessing
+from multiprocessing.queues import Queue
 from os import getenv
 from dotenv import load_dotenv
 from random import choice
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
 
 from aiogram import Bot, Dispatcher, Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
+from aiogram.utils.callback_answer import CallbackAnswer, CallbackAnswerMiddleware
 
 from callbacks.profile import router as profile_router
 from callbacks.support import router as support_router
 from callbacks.admin_panel import router as admin_router
 from callbacks.schedule import router as schedule_router
+from callbacks.inline_mode import router as inline_router
 
 from keyboards.builders import inline_builder, kb_groups
+from keyboards.callback_data import GroupCallback
+
+from middlewares.data_loader import DataLoaderMiddleware
+from middlewares.callback_answer import CallbackMessageMiddleware
+from middlewares.usage import UsageMiddleware
 
 from utils.db.main import Database
-from utils.parser import Parser
+from utils.db.settings_manager import PARSER_MODE_CHANNEL, SCHEDULE_CHANNEL
+from utils.db.data_loader import DataLoader
+from utils.ingest import IngestCoordinator
+from utils.http_client import close_scraper_client
+from utils.fsm_storage import create_fsm_storage
+from utils.cluster import ClusterEvents, LeaderElection, consume_updates, run_cluster
+from utils.scheduling import AdaptiveParserScheduler
 from utils.states import GetGroupName
+from utils.logging_config import setup_logging, setup_worker_logging
+from utils.bot_session import RateLimitedSession
+from utils.inline_index import InlineIndex
+from utils.digest import DigestSender
+from utils.feeds import start_feed_server
+from utils.usage import UsageTracker
+from utils.profiler import LoopLagWatchdog, LoopProfiler
+from utils.message_fingerprints import MessageFingerprints, SkipRedundantEditsMiddleware
+from utils.warm_cache import cache_path, load_warm_cache, save_warm_cache
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("app.log", encoding="utf-8")
-    ]
-)
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 router = Router()
-load_dotenv()
 
 
 test_pattern = [
@@ -49,23 +65,26 @@ test_pattern = [
 ]
 
 
-async def run_parser(db: Database):
-    logger.info("Запуск парсера...")
+async def run_retention(db: Database):
+    logger.info("Обслуживание истории расписания...")
     try:
-        parser = Parser()
-        await parser.get_schedule()
-        await parser.save_db_data(db)
-        logger.info("Парсер успешно завершил работу.")
+        await db.run_schedule_retention()
+        logger.info("Обслуживание истории расписания завершено.")
     except Exception as e:
-        logger.error(f"Ошибка в парсере: {e}", exc_info=True)
+        logger.error("Ошибка при обслуживании истории расписания: %s", e, exc_info=True)
 
 
-async def scheduler_task(db: Database):
+async def scheduler_task(bot: Bot, db: Database, ingest: IngestCoordinator) -> AdaptiveParserScheduler:
     logger.info("Запуск планировщика...")
     scheduler = AsyncIOScheduler()
 
-    scheduler.add_job(run_parser, IntervalTrigger(hours=2), kwargs={"db": db})
+    parser_scheduler = AdaptiveParserScheduler(scheduler, db, ingest)
+    scheduler.add_job(run_retention, CronTrigger(hour=4), kwargs={"db": db})
+    DigestSender(bot, db).schedule(scheduler)
     scheduler.start()
+    await parser_scheduler.start()
+
+    return parser_scheduler
 
 
 async def welcome_message(
@@ -79,7 +98,7 @@ async def welcome_message(
             username=message.from_user.username,
             group_name=group
         )
-        logger.info(f"Добавлен новый пользователь {message.from_user.username} в группу {group}")
+        logger.info("Добавлен новый пользователь %s в группу %s", message.from_user.username, group)
 
     pattern = dict(
         text=choice(test_pattern),
@@ -101,55 +120,170 @@ async def welcome_message(
 async def main_menu(
     message: Message | CallbackQuery,
     db: Database,
+    loader: DataLoader,
     state: FSMContext
 ):
     user_id = message.from_user.id
 
-    if not await db.user_exists(user_id):
+    if not await loader.user_exists(user_id):
         groups = await db.get_groups_name()
-        await message.answer("Из какой ты группы?", reply_markup=kb_groups(groups))
+        await message.answer("Из какой ты группы?", reply_markup=kb_groups(groups, db.data_version))
         await state.set_state(GetGroupName.group_name)
-        logger.info(f"Пользователь {user_id} выбирает группу.")
+        logger.info("Пользователь %s выбирает группу.", user_id)
         return
 
     await welcome_message(message, db)
 
 
-@router.callback_query(GetGroupName.group_name, F.data)
-async def get_group_name(callback_query: CallbackQuery, state: FSMContext, db: Database):
+@router.callback_query(GetGroupName.group_name, GroupCallback.filter())
+async def get_group_name(
+    callback_query: CallbackQuery,
+    callback_data: GroupCallback,
+    callback_answer: CallbackAnswer,
+    state: FSMContext,
+    db: Database
+):
+    group = await db.get_group_name_by_id(callback_data.group_id)
+    if group is None:
+        # Устаревшая клавиатура: группы с таким id больше нет в списке
+        callback_answer.text = 'Такой группы нет, выберите из списка.'
+        callback_answer.show_alert = True
+        await callback_query.message.edit_reply_markup(
+            reply_markup=kb_groups(await db.get_groups_name(), db.data_version)
+        )
+        return
+
     await state.clear()
-    logger.info(f"Пользователь {callback_query.from_user.id} выбрал группу {callback_query.data}")
-    await welcome_message(callback_query, db, callback_query.data)
+    logger.info("Пользователь %s выбрал группу %s", callback_query.from_user.id, group)
+    await welcome_message(callback_query, db, group)
 
 
-async def main():
-    logger.info("Запуск бота...")
-
-    bot = Bot(getenv("TG_TOKEN"))
-    dp = Dispatcher()
+async def create_app(
+    storage_default: str = 'memory',
+    worker: int | None = None
+) -> tuple[Bot, Dispatcher, Database]:
+    bot = Bot(getenv("TG_TOKEN"), session=RateLimitedSession())
     db = Database()
+    fingerprints = MessageFingerprints()
+    bot.session.middleware(SkipRedundantEditsMiddleware(fingerprints))
+    warm_cache_path = cache_path(worker)
 
     await db.connect()
-    await db.create_and_check_table()
-
+    await db.migrate()
+    if not await load_warm_cache(db, warm_cache_path):
+        await db.load_snapshot()
+
+    dp = Dispatcher(storage=create_fsm_storage(db.pool, storage_default))
+    usage = UsageTracker(db, interval=float(getenv('USAGE_FLUSH_INTERVAL', 60)))
+    usage.start()
+    dp.update.outer_middleware(UsageMiddleware(usage))
+    dp.update.outer_middleware(DataLoaderMiddleware())
+    dp.callback_query.outer_middleware(CallbackMessageMiddleware(fingerprints))
+    dp.callback_query.middleware(CallbackAnswerMiddleware())
     dp.include_routers(
         router, profile_router, support_router, 
-        admin_router, schedule_router
+        admin_router, schedule_router, inline_router
     )
 
-    asyncio.create_task(scheduler_task(db))
+    ingest = IngestCoordinator(db)
+    await ingest.start()
+
+    dp["db"] = db
+    dp["ingest"] = ingest
+    dp["parser_scheduler"] = None
+    dp["warm_cache_path"] = warm_cache_path
+    dp["fingerprints"] = fingerprints
+    dp["inline_index"] = InlineIndex()
+    dp["feed_runner"] = await start_feed_server(db)
+    dp["usage"] = usage
+    dp["profiler"] = LoopProfiler()
+
+    lag_threshold = float(getenv('LOOP_LAG_THRESHOLD', 0.5))
+    dp["watchdog"] = LoopLagWatchdog(lag_threshold) if lag_threshold > 0 else None
+    if dp["watchdog"] is not None:
+        dp["watchdog"].start()
+
+    return bot, dp, db
+
+
+async def shutdown_app(bot: Bot, dp: Dispatcher, db: Database) -> None:
+    if dp["feed_runner"] is not None:
+        await dp["feed_runner"].cleanup()
+    await dp.storage.close()
+    await bot.session.close()
+    await close_scraper_client()
+    await dp["usage"].stop()
+    if dp["watchdog"] is not None:
+        await dp["watchdog"].stop()
+    await save_warm_cache(db, dp["warm_cache_path"])
+    await db.close()
+    logger.info("База данных закрыта. Бот остановлен.")
+
+
+async def main():
+    logger.info("Запуск бота...")
+
+    bot, dp, db = await create_app()
+    dp["parser_scheduler"] = await scheduler_task(bot, db, dp["ingest"])
 
     await bot.delete_webhook(True)
-    await dp.start_polling(bot, db=db)
+    await dp.start_polling(bot)
 
-    await db.close()
-    logger.info("База данных закрыта. Бот остановлен.")
+    await shutdown_app(bot, dp, db)
+
+
+async def cluster_worker_main(index: int, queue: Queue) -> None:
+    logger.info("Запуск процесса-обработчика %s...", index)
+
+    bot, dp, db = await create_app(storage_default='postgres', worker=index)
+
+    async def lead():
+        parser_scheduler = await scheduler_task(bot, db, dp["ingest"])
+        dp["parser_scheduler"] = parser_scheduler
+        try:
+            await asyncio.Event().wait()
+        finally:
+            dp["parser_scheduler"] = None
+            parser_scheduler.scheduler.shutdown(wait=False)
+
+    async def apply_parser_mode():
+        if dp["parser_scheduler"] is not None:
+            await dp["parser_scheduler"].reload_override()
+
+    # Расписание обновляет один процесс, остальные перезагружают снимок по оповещению
+    events = ClusterEvents(db.create_connection)
+    events.on(SCHEDULE_CHANNEL, db.reload_schedule)
+    events.on(PARSER_MODE_CHANNEL, apply_parser_mode)
+
+    listener = asyncio.create_task(events.run())
+    election = asyncio.create_task(LeaderElection(db.create_connection).run(lead))
+    try:
+        await consume_updates(bot, dp, queue)
+    finally:
+        election.cancel()
+        listener.cancel()
+        await shutdown_app(bot, dp, db)
+
+
+def cluster_worker(index: int, queue: Queue, log_queue: Queue) -> None:
+    setup_worker_logging(log_queue)
+    try:
+        asyncio.run(cluster_worker_main(index, queue))
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
+    workers = int(getenv("BOT_WORKERS", 1))
     try:
-        asyncio.run(main())
+        if workers > 1:
+            # Файл лога пишет только главный процесс, обработчики шлют записи в очередь
+            listener = setup_logging(multiprocessing.get_context('spawn').Queue())
+            run_cluster(workers, cluster_worker, getenv("TG_TOKEN"), listener.queue)
+        else:
+            setup_logging()
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Бот остановлен пользователем.")
     except Exception as e:
-        logger.error(f"Критическая ошибка: {e}", exc_info=True)
+        logger.error("Критическая ошибка: %s", e, exc_info=True)
@@ -0,0 +1,42 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import CallbackQuery, Message
+
+from utils.message_fingerprints import MessageFingerprints
+
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackMessageMiddleware(BaseMiddleware):
+    """
+    Запоминает отпечаток сообщения с кнопкой, чтобы правки,
+    не меняющие его, не отправлялись.
+
+    На обработанные callback'и отвечает CallbackAnswerMiddleware aiogram;
+    здесь отвечаем только на те, для которых обработчика не нашлось
+    (устаревшая кнопка, нет прав), чтобы не крутился индикатор загрузки.
+    """
+    def __init__(self, fingerprints: MessageFingerprints) -> None:
+        self.fingerprints = fingerprints
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any]
+    ) -> Any:
+        if isinstance(event.message, Message):
+            self.fingerprints.remember_message(event.message)
+
+        result = await handler(event, data)
+        if result is UNHANDLED and not self.fingerprints.is_answered(event.id):
+            try:
+                await event.answer()
+            except TelegramAPIError as e:
+                logger.debug("Не удалось ответить на callback %s: %s", event.id, e)
+        return result
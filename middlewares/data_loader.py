@@ -0,0 +1,20 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from utils.db.data_loader import DataLoader
+
+
+class DataLoaderMiddleware(BaseMiddleware):
+    """
+    Создаёт DataLoader на каждый апдейт и передаёт его обработчикам как loader.
+    """
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        data['loader'] = DataLoader(data['db'])
+        return await handler(event, data)
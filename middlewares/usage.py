@@ -0,0 +1,64 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, InlineQuery, Message, TelegramObject, Update
+
+from keyboards.callback_data import day_to_date
+from utils.db.cache import MISSING
+from utils.db.main import Database
+from utils.usage import UsageTracker
+
+
+# Префиксы callback_data, у которых первое поле — дата (см. keyboards.callback_data)
+DATED_PREFIXES = {'s', 'og', 'ed', 'al', 'w'}
+
+
+class UsageMiddleware(BaseMiddleware):
+    """
+    Считает действия пользователей. После обработчика берёт группу
+    пользователя из кэша (без запроса к БД) и увеличивает счётчик в памяти.
+    """
+    def __init__(self, tracker: UsageTracker) -> None:
+        self.tracker = tracker
+
+    def _action(self, event: TelegramObject) -> tuple[str, Any, Any]:
+        """
+        Возвращает действие, дату и id группы из callback_data (если есть).
+        """
+        if isinstance(event, CallbackQuery) and event.data:
+            prefix, *fields = event.data.split(':')
+            day = group_id = None
+            if prefix in DATED_PREFIXES and fields and fields[0].lstrip('-').isdigit():
+                day = day_to_date(int(fields[0]))
+                if len(fields) > 1 and fields[1].isdigit():
+                    group_id = int(fields[1])
+            return f'callback:{prefix}'[:32], day, group_id
+        if isinstance(event, Message):
+            return ('command' if (event.text or '').startswith('/') else 'message'), None, None
+        if isinstance(event, InlineQuery):
+            return 'inline', None, None
+        return type(event).__name__.lower()[:32], None, None
+
+    def _group_name(self, db: Database, user_id: int, group_id: Any) -> Any:
+        groups = db._fetch_groups_name.cache_peek()
+        if group_id is not None and groups is not MISSING:
+            for group in groups:
+                if group['group_id'] == group_id:
+                    return group['group_name']
+        group_name = db.get_group.cache_peek(user_id)
+        return None if group_name is MISSING else group_name
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        try:
+            return await handler(event, data)
+        finally:
+            user = data.get('event_from_user')
+            if user is not None:
+                action, day, group_id = self._action(event.event)
+                group_name = self._group_name(data['db'], user.id, group_id)
+                self.tracker.track(user.id, action, group_name, day)
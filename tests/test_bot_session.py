@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.bot_session import BULK, INTERACTIVE, RateLimitedSession, RequestScheduler, TokenBucket
+
+
+def test_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = time.monotonic()
+    for _ in range(2):
+        assert bucket.delay(now) == 0
+        bucket.take()
+
+    assert bucket.delay(now) == pytest.approx(0.5, abs=0.01)
+    assert bucket.delay(now + 0.5) == 0
+
+
+def test_bucket_pause_delays_requests():
+    bucket = TokenBucket(rate=10, capacity=10)
+    bucket.pause(5)
+
+    assert bucket.delay(time.monotonic()) == pytest.approx(5, abs=0.1)
+
+
+async def run_in_order(scheduler: RequestScheduler, requests) -> list:
+    order = []
+
+    async def request(name, priority, chat_id):
+        await scheduler.acquire(priority, chat_id)
+        order.append(name)
+
+    tasks = []
+    for name, priority, chat_id in requests:
+        tasks.append(asyncio.create_task(request(name, priority, chat_id)))
+        await asyncio.sleep(0)
+    await asyncio.wait_for(asyncio.gather(*tasks), 5)
+    return order
+
+
+def test_interactive_requests_overtake_bulk():
+    async def main():
+        scheduler = RequestScheduler(global_rate=20)
+        scheduler.global_bucket.tokens = 0
+        return await run_in_order(scheduler, [
+            ('bulk-1', BULK, 1), ('bulk-2', BULK, 2), ('reply', INTERACTIVE, 3)
+        ])
+
+    assert asyncio.run(main()) == ['reply', 'bulk-1', 'bulk-2']
+
+
+def test_busy_chat_does_not_block_other_chats():
+    async def main():
+        scheduler = RequestScheduler(global_rate=100, chat_rate=10, chat_burst=1)
+        return await run_in_order(scheduler, [
+            ('chat1-a', INTERACTIVE, 1), ('chat1-b', INTERACTIVE, 1), ('chat2', INTERACTIVE, 2)
+        ])
+
+    assert asyncio.run(main()) == ['chat1-a', 'chat2', 'chat1-b']
+
+
+def test_scheduler_counts_requests_per_priority():
+    async def main():
+        scheduler = RequestScheduler(global_rate=100)
+        await run_in_order(scheduler, [('a', INTERACTIVE, None), ('b', BULK, None)])
+        return scheduler.info()
+
+    info = asyncio.run(main())
+    assert info[INTERACTIVE]['requests'] == 1
+    assert info[BULK]['requests'] == 1
+    assert info[INTERACTIVE]['queue'] == info[BULK]['queue'] == 0
+
+
+def test_global_rate_is_split_between_workers(monkeypatch):
+    monkeypatch.setenv('BOT_API_RATE', '30')
+    monkeypatch.setenv('BOT_WORKERS', '3')
+
+    session = RateLimitedSession()
+
+    assert session.scheduler.global_bucket.rate == 10
@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.db import cache as cache_module
+from utils.db.cache import MISSING, TTLCache
+
+
+def make_cache(ttl=60, until_midnight=False, stale_ttl=60, delay=0.01):
+    calls = []
+
+    async def func(instance, key):
+        calls.append(key)
+        number = len(calls)
+        await asyncio.sleep(delay)
+        return f'{key}:{number}'
+
+    return TTLCache(func, ttl, until_midnight, stale_ttl, maxsize=16), calls
+
+
+def test_concurrent_misses_are_coalesced():
+    cache, calls = make_cache()
+
+    async def main():
+        return await asyncio.gather(*(cache.get(None, ('a',), {}) for _ in range(5)))
+
+    assert asyncio.run(main()) == ['a:1'] * 5
+    assert calls == ['a']
+    assert cache.stats['coalesced'] == 4
+
+
+def test_cancelled_first_caller_does_not_cancel_waiters():
+    cache, calls = make_cache(delay=0.05)
+
+    async def main():
+        first = asyncio.create_task(cache.get(None, ('a',), {}))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get(None, ('a',), {}))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 'a:1'
+    assert calls == ['a']
+    assert cache.peek('a') == 'a:1'
+
+
+def test_errors_reach_all_waiters_and_are_not_cached():
+    attempts = []
+
+    async def func(instance, key):
+        attempts.append(key)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError('db down')
+        return 'ok'
+
+    cache = TTLCache(func, 60, False, 60, maxsize=16)
+
+    async def main():
+        results = await asyncio.gather(
+            cache.get(None, ('a',), {}), cache.get(None, ('a',), {}),
+            return_exceptions=True
+        )
+        return results, await cache.get(None, ('a',), {})
+
+    results, retry = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retry == 'ok'
+    assert len(attempts) == 2
+
+
+def test_stale_value_is_served_while_refreshing():
+    cache, calls = make_cache()
+
+    async def main():
+        assert await cache.get(None, ('a',), {}) == 'a:1'
+        # Запись истекла, но ещё в окне stale_ttl
+        cache._data[(('a',), ())].expires_at = time.monotonic() - 1
+        stale = await cache.get(None, ('a',), {})
+        await asyncio.sleep(0.05)
+        return stale, await cache.get(None, ('a',), {})
+
+    assert asyncio.run(main()) == ('a:1', 'a:2')
+    assert cache.stats['stale_hits'] == 1
+    assert cache.stats['refreshes'] == 1
+
+
+def test_value_past_stale_window_is_reloaded():
+    cache, calls = make_cache(stale_ttl=10)
+
+    async def main():
+        await cache.get(None, ('a',), {})
+        cache._data[(('a',), ())].expires_at = time.monotonic() - 11
+        return await cache.get(None, ('a',), {})
+
+    assert asyncio.run(main()) == 'a:2'
+    assert cache.stats['misses'] == 2
+
+
+def test_until_midnight_caps_ttl(monkeypatch):
+    monkeypatch.setattr(cache_module, 'seconds_until_midnight', lambda: 5)
+    cache, _ = make_cache(ttl=3600, until_midnight=True)
+
+    asyncio.run(cache.get(None, ('a',), {}))
+
+    assert cache._data[(('a',), ())].expires_at - time.monotonic() == pytest.approx(5, abs=1)
+
+
+def test_peek_does_not_count_as_hit():
+    cache, _ = make_cache()
+    assert cache.peek('a') is MISSING
+
+    asyncio.run(cache.get(None, ('a',), {}))
+
+    assert cache.peek('a') == 'a:1'
+    assert cache.stats['hits'] == 0
+
+
+def test_dump_and_load_keep_remaining_ttl():
+    cache, _ = make_cache(ttl=100)
+    asyncio.run(cache.get(None, ('a',), {}))
+
+    restored, _ = make_cache(ttl=100)
+    assert restored.load(cache.dump(), elapsed=40) == 1
+    assert restored.peek('a') == 'a:1'
+    assert restored._data[(('a',), ())].expires_at - time.monotonic() == pytest.approx(60, abs=1)
+    assert restored.load(cache.dump(), elapsed=200) == 0
+
+
+def test_load_started_before_clear_is_not_cached():
+    cache, calls = make_cache(delay=0.05)
+
+    async def main():
+        before = asyncio.create_task(cache.get(None, ('a',), {}))
+        await asyncio.sleep(0.01)
+        # Запись в БД и очистка кэша, пока загрузка ещё идёт
+        cache.clear()
+        after = await cache.get(None, ('a',), {})
+        return await before, after, await cache.get(None, ('a',), {})
+
+    before, after, later = asyncio.run(main())
+    assert before == 'a:1'
+    assert after == later == 'a:2'
+    assert calls == ['a', 'a']
+
+
+def test_load_started_before_invalidate_is_not_cached():
+    cache, calls = make_cache(delay=0.05)
+
+    async def main():
+        before = asyncio.create_task(cache.get(None, ('a',), {}))
+        await asyncio.sleep(0.01)
+        cache.invalidate('a')
+        await before
+        return cache.peek('a'), await cache.get(None, ('a',), {})
+
+    assert asyncio.run(main()) == (MISSING, 'a:2')
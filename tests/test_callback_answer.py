@@ -0,0 +1,41 @@
+import asyncio
+from types import SimpleNamespace
+
+from aiogram.dispatcher.event.bases import UNHANDLED
+
+from middlewares.callback_answer import CallbackMessageMiddleware
+from utils.message_fingerprints import MessageFingerprints
+
+
+def make_event(answers: list) -> SimpleNamespace:
+    async def answer(*args, **kwargs):
+        answers.append(kwargs)
+
+    return SimpleNamespace(id='1', message=None, answer=answer)
+
+
+async def call(fingerprints: MessageFingerprints, event, result):
+    async def handler(event, data):
+        return result
+
+    return await CallbackMessageMiddleware(fingerprints)(handler, event, {})
+
+
+def test_unhandled_callback_is_answered():
+    answers = []
+    assert asyncio.run(call(MessageFingerprints(), make_event(answers), UNHANDLED)) is UNHANDLED
+    assert answers == [{}]
+
+
+def test_handled_callback_is_left_to_callback_answer_middleware():
+    answers = []
+    asyncio.run(call(MessageFingerprints(), make_event(answers), None))
+    assert answers == []
+
+
+def test_answered_unhandled_callback_is_not_answered_again():
+    answers = []
+    fingerprints = MessageFingerprints()
+    fingerprints.mark_answered('1')
+    asyncio.run(call(fingerprints, make_event(answers), UNHANDLED))
+    assert answers == []
@@ -0,0 +1,127 @@
+import asyncio
+import gzip
+import json
+from datetime import date
+from types import SimpleNamespace
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from utils.db.schedule_snapshot import ScheduleSnapshot
+from utils.feeds import Feed, FeedStore, _ics_escape, _ics_fold, create_feed_app, render_ics, render_json
+
+
+def make_day(day: date, start_at='8:30', numbers=('1', '2')) -> dict:
+    return {
+        'group_name': 'ИС-21', 'group_id': 1, 'display_order': 1,
+        'date': day, 'weekday': 'понедельник', 'start_at': start_at,
+        'alert': None, 'formation': None,
+        'subjects': [
+            {'subject_number': number, 'subject_name': 'Математика', 'room_number': '101', 'teacher': 'Иванов'}
+            for number in numbers
+        ]
+    }
+
+
+def test_fold_keeps_lines_within_75_octets():
+    line = 'DESCRIPTION:' + 'Расписание; ' * 30
+    parts = _ics_fold(line)
+
+    assert len(parts) > 1
+    assert all(len(part.encode()) <= 75 for part in parts)
+    assert all(part.startswith(' ') for part in parts[1:])
+    assert parts[0] + ''.join(part[1:] for part in parts[1:]) == line
+
+
+def test_short_line_is_not_folded():
+    assert _ics_fold('VERSION:2.0') == ['VERSION:2.0']
+
+
+def test_escape_special_characters():
+    assert _ics_escape('a,b;c\\d\ne') == 'a\\,b\\;c\\\\d\\ne'
+
+
+def test_events_have_utc_start_and_end(monkeypatch):
+    monkeypatch.setenv('SCHEDULE_TZ', 'Europe/Moscow')
+    text = render_ics('ИС-21', 1, [make_day(date(2026, 10, 19), numbers=('1', '3'))]).decode()
+
+    # 8:30 МСК = 5:30 UTC, пары с 1-й по 3-ю: 3 × 90 + 2 × 10 минут
+    assert 'DTSTART:20261019T053000Z' in text
+    assert 'DTEND:20261019T102000Z' in text
+    assert 'X-WR-TIMEZONE:Europe/Moscow' in text
+    assert text.endswith('END:VCALENDAR\r\n')
+
+
+def test_day_without_start_is_all_day():
+    text = render_ics('ИС-21', 1, [make_day(date(2026, 10, 19), start_at=None)]).decode()
+
+    assert 'DTSTART;VALUE=DATE:20261019' in text
+    assert 'DTEND;VALUE=DATE:20261020' in text
+
+
+def test_render_json():
+    data = json.loads(render_json('ИС-21', 1, [make_day(date(2026, 10, 19))]))
+
+    assert data['group'] == 'ИС-21'
+    assert data['days'][0]['date'] == '2026-10-19'
+    assert len(data['days'][0]['subjects']) == 2
+
+
+def test_feed_build():
+    feed = Feed.build('text/plain', b'body')
+
+    assert gzip.decompress(feed.body_gzip) == b'body'
+    assert feed.etag.startswith('"') and feed.etag.endswith('"')
+    assert Feed.build('text/plain', b'body').etag == feed.etag
+
+
+def make_db(records: list, groups: list) -> SimpleNamespace:
+    async def get_groups_name():
+        return [{'group_name': name, 'group_id': group_id} for name, group_id in groups]
+
+    snapshot = ScheduleSnapshot.from_records(records, date.today())
+    return SimpleNamespace(snapshot=snapshot, data_version=1, get_groups_name=get_groups_name)
+
+
+def test_serve_feed_with_etag():
+    db = make_db([make_day(date.today())], [('ИС-21', 1)])
+
+    async def main():
+        async with TestClient(TestServer(create_feed_app(db))) as client:
+            response = await client.get('/feeds/1.ics', headers={'Accept-Encoding': 'identity'})
+            assert response.status == 200
+            assert response.headers['Content-Type'].startswith('text/calendar')
+            etag = response.headers['ETag']
+
+            cached = await client.get(
+                '/feeds/1.ics', headers={'Accept-Encoding': 'identity', 'If-None-Match': etag}
+            )
+            assert cached.status == 304
+
+            compressed = await client.get('/feeds/1.json', headers={'Accept-Encoding': 'gzip'})
+            assert compressed.status == 200
+            assert json.loads(await compressed.read())['group_id'] == 1
+
+            missing = await client.get('/feeds/2.ics')
+            assert missing.status == 404
+
+    asyncio.run(main())
+
+
+def test_feeds_follow_groups_list():
+    groups = [('ИС-21', 1), ('ИС-22', 2)]
+    db = make_db([make_day(date.today())], groups)
+    store = FeedStore(db)
+
+    async def main():
+        # У группы без занятий в снимке — пустой календарь, а не 404
+        empty = await store.get(2, 'ics')
+        assert empty is not None
+        assert b'BEGIN:VCALENDAR' in empty.body and b'BEGIN:VEVENT' not in empty.body
+        assert json.loads((await store.get(2, 'json')).body)['days'] == []
+
+        groups.pop()
+        db.data_version += 1
+        assert await store.get(2, 'ics') is None
+        assert await store.get(1, 'ics') is not None
+
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+from utils.formatting import MESSAGE_LIMIT, format_schedule, format_week
+
+
+def make_day(day: date, pairs: int = 4, name_length: int = 10) -> dict:
+    return {
+        'group_name': 'ИС-21',
+        'date': day,
+        'weekday': 'понедельник',
+        'start_at': '8:30',
+        'subjects': [
+            {
+                'subject_number': str(number),
+                'subject_name': 'П' * name_length,
+                'room_number': '101',
+                'teacher': 'Иванов И.И.'
+            }
+            for number in range(1, pairs + 1)
+        ]
+    }
+
+
+def week(name_length: int) -> list:
+    monday = date(2026, 10, 19)
+    return [make_day(monday + timedelta(days=i), name_length=name_length) for i in range(6)]
+
+
+def test_week_fits_with_teachers():
+    text = format_week('ИС-21', week(name_length=10))
+
+    assert text.startswith('Расписание группы ИС-21 на неделю.')
+    assert 'Пн 19.10, начало в 8:30' in text
+    assert 'Сб 24.10' in text
+    assert '(Иванов И.И.)' in text
+
+
+def test_teachers_dropped_when_too_long():
+    # С преподавателями не помещается, без них — помещается
+    schedules = week(name_length=140)
+    text = format_week('ИС-21', schedules)
+
+    assert len(text) <= MESSAGE_LIMIT
+    assert 'Иванов' not in text
+    assert 'Сб 24.10' in text
+
+
+def test_days_truncated_when_still_too_long():
+    text = format_week('ИС-21', week(name_length=400))
+
+    assert len(text) <= MESSAGE_LIMIT
+    assert text.endswith('...')
+    assert 'Пн 19.10' in text
+    assert 'Сб 24.10' not in text
+
+
+def test_empty_week_has_header_only():
+    assert format_week('ИС-21', []) == 'Расписание группы ИС-21 на неделю.\n\n'
+
+
+def test_format_schedule_accepts_json_subjects():
+    schedule = make_day(date(2026, 10, 19), pairs=1)
+    schedule['subjects'] = '[{"subject_number": "1", "subject_name": "Химия", "room_number": "7", "teacher": "Петров"}]'
+
+    text = format_schedule(schedule)
+
+    assert '1. Химия - 7' in text
+    assert 'Преподаватель: Петров' in text
@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from utils.http_client import CircuitBreaker, CircuitOpenError, ScraperClient
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.before_request()
+        breaker.record_failure()
+
+
+def expire(breaker: CircuitBreaker) -> None:
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == 'closed'
+
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_half_open_admits_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    open_breaker(breaker)
+    expire(breaker)
+
+    assert breaker.state == 'half-open'
+    assert breaker.before_request() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.before_request() is False
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    open_breaker(breaker)
+    expire(breaker)
+
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+
+def test_released_probe_lets_next_request_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    open_breaker(breaker)
+    expire(breaker)
+
+    breaker.before_request()
+    breaker.release_probe()
+    assert breaker.state == 'half-open'
+    assert breaker.before_request() is True
+
+
+class FakeResponse:
+    def __init__(self, status: int = 200, text: str = 'ok', error: Exception = None) -> None:
+        self.status = status
+        self.reason = 'reason'
+        self.request_info = None
+        self.history = ()
+        self._text = text
+        self._error = error
+
+    async def __aenter__(self) -> 'FakeResponse':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(None, (), status=self.status, message=self.reason)
+
+    async def text(self) -> str:
+        if self._error is not None:
+            raise self._error
+        await asyncio.sleep(0)
+        return self._text
+
+
+class FakeSession:
+    closed = False
+
+    def __init__(self, *responses) -> None:
+        self.responses = list(responses)
+
+    def get(self, url: str, **kwargs) -> FakeResponse:
+        return self.responses.pop(0)
+
+
+def half_open_client(*responses) -> ScraperClient:
+    client = ScraperClient()
+    client.retries = 0
+    client._session = FakeSession(*responses)
+    open_breaker(client.breaker)
+    expire(client.breaker)
+    return client
+
+
+def test_probe_with_client_error_closes_breaker():
+    client = half_open_client(FakeResponse(status=404))
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(client.get_text('http://example'))
+    assert client.breaker.state == 'closed'
+
+
+def test_probe_with_payload_error_is_released():
+    client = half_open_client(FakeResponse(error=aiohttp.ClientPayloadError('broken')))
+
+    with pytest.raises(aiohttp.ClientPayloadError):
+        asyncio.run(client.get_text('http://example'))
+    assert client.breaker.before_request() is False
+
+
+def test_cancelled_probe_is_released():
+    class HangingResponse(FakeResponse):
+        async def __aenter__(self):
+            await asyncio.sleep(10)
+
+    client = half_open_client(HangingResponse())
+
+    async def main():
+        task = asyncio.create_task(client.get_text('http://example'))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert client.breaker.state == 'half-open'
+    assert client.breaker.before_request() is True
+
+
+def test_retryable_status_reopens_breaker():
+    client = half_open_client(FakeResponse(status=503))
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        asyncio.run(client.get_text('http://example'))
+    assert client.breaker.state == 'open'
+
+
+def test_successful_probe_returns_text():
+    client = half_open_client(FakeResponse(text='page'))
+
+    assert asyncio.run(client.get_text('http://example')) == 'page'
+    assert client.breaker.state == 'closed'
@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+
+from utils.db.schedule_snapshot import ScheduleSnapshot
+from utils.inline_index import InlineIndex, PrefixTrie, normalize
+
+
+def test_normalize_ignores_case_separators_and_yo():
+    assert normalize('ИС-21') == normalize('ис 21') == normalize('ис21') == 'ис21'
+    assert normalize('Пётр') == 'петр'
+
+
+def test_trie_finds_items_by_prefix():
+    trie = PrefixTrie()
+    trie.insert('ис21', 0)
+    trie.insert('ис22', 1)
+    trie.insert('пк11', 2)
+
+    assert trie.search('ис') == [0, 1]
+    assert trie.search('ис22') == [1]
+    assert trie.search('ис23') == []
+    assert trie.search('x') == []
+
+
+def test_trie_limits_and_deduplicates_items():
+    trie = PrefixTrie(limit=2)
+    for item in range(5):
+        trie.insert('ab', item)
+    trie.insert('ab', 0)
+
+    assert trie.search('a') == [0, 1]
+
+
+def make_snapshot(day: date) -> ScheduleSnapshot:
+    rows = [
+        ('ИС-21', 1, [{'subject_number': '1', 'subject_name': 'Математика', 'room_number': '101', 'teacher': 'Иванов И.И.'}]),
+        ('ИС-22', 2, [{'subject_number': '2', 'subject_name': 'Физика', 'room_number': '102', 'teacher': 'Петров П.П.'}]),
+        ('ПК-11', 3, [{'subject_number': '1', 'subject_name': 'Химия', 'room_number': '103', 'teacher': 'Иванов И.И.'}]),
+    ]
+    records = [
+        {
+            'group_name': group_name, 'group_id': group_id, 'display_order': group_id,
+            'date': day, 'weekday': 'понедельник', 'start_at': '8:30',
+            'alert': None, 'formation': None, 'subjects': subjects
+        }
+        for group_name, group_id, subjects in rows
+    ]
+    return ScheduleSnapshot.from_records(records, day)
+
+
+def test_search_groups_and_teachers():
+    day = date.today()
+    index = InlineIndex()
+    snapshot = make_snapshot(day)
+
+    assert [a.title for a in index.search('ис 2', snapshot, 1)] == ['ИС-21', 'ИС-22']
+    assert [a.title for a in index.search('иванов', snapshot, 1)] == ['Иванов И.И.']
+
+    teacher = index.search('иванов', snapshot, 1)[0]
+    assert 'ИС-21' in teacher.input_message_content.message_text
+    assert 'ПК-11' in teacher.input_message_content.message_text
+
+
+def test_empty_query_returns_groups_first():
+    index = InlineIndex()
+    results = index.search('', make_snapshot(date.today()), 1)
+
+    assert [a.title for a in results[:3]] == ['ИС-21', 'ИС-22', 'ПК-11']
+
+
+def test_index_is_rebuilt_on_new_version():
+    day = date.today()
+    index = InlineIndex()
+    index.search('ис', make_snapshot(day), 1)
+    built = index.articles
+
+    index.search('ис', make_snapshot(day), 1)
+    assert index.articles is built
+
+    index.search('ис', make_snapshot(day), 2)
+    assert index.articles is not built
+
+
+def test_no_results_without_snapshot_or_future_days():
+    index = InlineIndex()
+
+    assert index.search('ис', None, 1) == []
+    assert index.search('ис', make_snapshot(date.today() - timedelta(days=1)), 1) == []
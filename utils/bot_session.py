@@ -0,0 +1,256 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from os import getenv
+from typing import Any, Dict, Iterator, List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты исходящих запросов: меньше — раньше
+INTERACTIVE = 0
+BULK = 1
+
+request_priority: ContextVar[int] = ContextVar('request_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_priority() -> Iterator[None]:
+    """
+    Запросы внутри блока (рассылки) уступают очередь ответам пользователям.
+    """
+    token = request_priority.set(BULK)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """
+        Через сколько секунд будет доступен токен (0 — доступен сейчас).
+        """
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.paused_until - now)
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def idle(self, now: float) -> bool:
+        return self.delay(now) == 0 and self.tokens >= self.capacity
+
+
+@dataclass(order=True)
+class Waiter:
+    priority: int
+    seq: int
+    chat_id: Optional[int] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class RequestScheduler:
+    """
+    Планировщик исходящих запросов к Bot API: общий token bucket на бота
+    и отдельные на каждый чат (в группах лимит строже). Из ожидающих
+    запросов первым проходит запрос с наивысшим приоритетом, чей чат
+    не исчерпал лимит.
+    """
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        group_rate: float = 20 / 60,
+        group_burst: float = 5
+    ) -> None:
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate, self.chat_burst = chat_rate, chat_burst
+        self.group_rate, self.group_burst = group_rate, group_burst
+        self._chats: Dict[int, TokenBucket] = {}
+        self._waiters: List[Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            priority: {'requests': 0, 'wait_total': 0.0, 'wait_max': 0.0}
+            for priority in (INTERACTIVE, BULK)
+        }
+
+    def chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10000:
+                now = time.monotonic()
+                self._chats = {key: b for key, b in self._chats.items() if not b.idle(now)}
+            if chat_id < 0:
+                bucket = TokenBucket(self.group_rate, self.group_burst)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    async def acquire(self, priority: int, chat_id: Optional[int]) -> None:
+        waiter = Waiter(
+            priority, next(self._seq), chat_id,
+            asyncio.get_running_loop().create_future(), time.monotonic()
+        )
+        heapq.heappush(self._waiters, waiter)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+        await waiter.future
+
+    def _ready(self, waiter: Waiter, now: float) -> float:
+        if waiter.chat_id is None:
+            return 0.0
+        return self.chat_bucket(waiter.chat_id).delay(now)
+
+    def _release(self, waiter: Waiter, now: float) -> None:
+        self._waiters.remove(waiter)
+        heapq.heapify(self._waiters)
+        self.global_bucket.take()
+        if waiter.chat_id is not None:
+            self.chat_bucket(waiter.chat_id).take()
+
+        waited = now - waiter.enqueued_at
+        stats = self.stats[waiter.priority]
+        stats['requests'] += 1
+        stats['wait_total'] += waited
+        stats['wait_max'] = max(stats['wait_max'], waited)
+        waiter.future.set_result(None)
+
+    async def _sleep(self, timeout: float) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            self._waiters = [w for w in self._waiters if not w.future.done()]
+            heapq.heapify(self._waiters)
+            if not self._waiters:
+                await self._sleep(60)
+                if not self._waiters:
+                    return
+                continue
+
+            now = time.monotonic()
+            delay = self.global_bucket.delay(now)
+            if delay > 0:
+                await self._sleep(delay)
+                continue
+
+            # Самый приоритетный запрос, чей чат готов; иначе ждём ближайший
+            delays = []
+            for waiter in sorted(self._waiters):
+                chat_delay = self._ready(waiter, now)
+                if chat_delay == 0:
+                    self._release(waiter, now)
+                    break
+                delays.append(chat_delay)
+            else:
+                await self._sleep(min(delays))
+
+    def pause(self, chat_id: Optional[int], seconds: float) -> None:
+        bucket = self.chat_bucket(chat_id) if chat_id is not None else self.global_bucket
+        bucket.pause(seconds)
+
+    def info(self) -> Dict[str, Any]:
+        depth = {INTERACTIVE: 0, BULK: 0}
+        for waiter in self._waiters:
+            if not waiter.future.done():
+                depth[waiter.priority] += 1
+        return {
+            priority: {
+                'queue': depth[priority],
+                'requests': stats['requests'],
+                'wait_avg': stats['wait_total'] / stats['requests'] if stats['requests'] else 0.0,
+                'wait_max': stats['wait_max']
+            }
+            for priority, stats in self.stats.items()
+        }
+
+
+class RateLimitedSession(AiohttpSession):
+    """
+    Сессия бота с пулом соединений BOT_API_CONNECTIONS, планировщиком
+    запросов по лимитам Telegram и повтором запросов после 429.
+
+    Лимит BOT_API_RATE общий на бота: при BOT_WORKERS процессах каждый
+    получает свою долю. Лимиты чатов считаются в процессе — апдейты
+    одного пользователя обрабатывает один процесс.
+    """
+    # Методы, которые создают новые сообщения и подпадают под лимит чата
+    CHAT_LIMITED_PREFIXES = ('Send', 'Copy', 'Forward')
+
+    def __init__(self, max_retries: int = 3, **kwargs: Any) -> None:
+        super().__init__(limit=int(getenv('BOT_API_CONNECTIONS', 100)), **kwargs)
+        self.max_retries = max_retries
+        workers = max(int(getenv('BOT_WORKERS', 1)), 1)
+        self.scheduler = RequestScheduler(global_rate=float(getenv('BOT_API_RATE', 30)) / workers)
+        self.retries = 0
+
+    def _chat_id(self, method: TelegramMethod) -> Optional[int]:
+        if not type(method).__name__.startswith(self.CHAT_LIMITED_PREFIXES):
+            return None
+        chat_id = getattr(method, 'chat_id', None)
+        return chat_id if isinstance(chat_id, int) else None
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: Optional[int] = None
+    ) -> TelegramType:
+        if isinstance(method, GetUpdates):
+            return await super().make_request(bot, method, timeout)
+
+        chat_id = self._chat_id(method)
+        priority = request_priority.get()
+        for attempt in range(self.max_retries + 1):
+            await self.scheduler.acquire(priority, chat_id)
+            try:
+                return await super().make_request(bot, method, timeout)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                self.scheduler.pause(chat_id, e.retry_after)
+                logger.warning(
+                    "Flood control для %s (чат %s), повтор через %s с.",
+                    type(method).__name__, chat_id, e.retry_after
+                )
+                await asyncio.sleep(e.retry_after)
+
+    def info(self) -> Dict[str, Any]:
+        return {'retries': self.retries, **self.scheduler.info()}
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import multiprocessing
+from multiprocessing.queues import Queue
+from typing import Awaitable, Callable, Dict, List
+
+import asyncpg
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import TelegramNetworkError
+from aiogram.types import Update
+
+from utils.db.settings_manager import NOTIFY_SENDER
+
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock лидера: только лидер запускает планировщик парсера
+LEADER_LOCK_ID = 7_240_003
+
+
+def route_update(update: Update, workers: int) -> int:
+    """
+    Возвращает номер процесса для апдейта: апдейты одного пользователя
+    всегда попадают в один и тот же процесс.
+    """
+    try:
+        event = update.event
+    except Exception:
+        return 0
+
+    user = getattr(event, 'from_user', None)
+    chat = getattr(event, 'chat', None)
+    key = user.id if user else chat.id if chat else 0
+    return key % workers
+
+
+async def poll_and_route(token: str, queues: List[Queue]) -> None:
+    """
+    Получает апдейты long polling'ом и раскладывает их по очередям процессов.
+    """
+    bot = Bot(token)
+    await bot.delete_webhook(True)
+    offset = None
+
+    try:
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=30)
+            except TelegramNetworkError as e:
+                logger.warning("Ошибка получения апдейтов: %s", e)
+                await asyncio.sleep(5)
+                continue
+
+            for update in updates:
+                offset = update.update_id + 1
+                queues[route_update(update, len(queues))].put(
+                    update.model_dump(mode='json', exclude_none=True)
+                )
+    finally:
+        await bot.session.close()
+
+
+async def consume_updates(bot: Bot, dp: Dispatcher, queue: Queue) -> None:
+    """
+    Обрабатывает апдейты из очереди процесса до получения None.
+    """
+    loop = asyncio.get_running_loop()
+    tasks = set()
+
+    while (update := await loop.run_in_executor(None, queue.get)) is not None:
+        task = asyncio.create_task(dp.feed_raw_update(bot, update))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class LeaderElection:
+    """
+    Выбор лидера через сессионный advisory lock в Postgres.
+    Блокировка держится на отдельном соединении: если процесс-лидер упадёт,
+    соединение закроется и лидером станет другой процесс.
+    """
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[asyncpg.Connection]],
+        lock_id: int = LEADER_LOCK_ID,
+        interval: float = 30
+    ) -> None:
+        self.connect = connect
+        self.lock_id = lock_id
+        self.interval = interval
+        self.is_leader = False
+
+    async def run(self, lead: Callable[[], Awaitable[None]]) -> None:
+        """
+        Пытается стать лидером и, пока блокировка удерживается, выполняет lead().
+        """
+        while True:
+            conn = None
+            try:
+                conn = await self.connect()
+                if await conn.fetchval("SELECT pg_try_advisory_lock($1);", self.lock_id):
+                    await self._lead(conn, lead)
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning("Ошибка выбора лидера: %s", e)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(self.interval)
+
+    async def _lead(self, conn: asyncpg.Connection, lead: Callable[[], Awaitable[None]]) -> None:
+        logger.info("Процесс стал лидером.")
+        self.is_leader = True
+        task = asyncio.create_task(lead())
+        try:
+            while not task.done():
+                await asyncio.sleep(self.interval)
+                # Проверяем, что соединение с блокировкой живо
+                await conn.fetchval("SELECT 1;")
+        finally:
+            self.is_leader = False
+            task.cancel()
+            logger.info("Процесс больше не лидер.")
+
+
+class ClusterEvents:
+    """
+    Оповещения между процессами через LISTEN/NOTIFY в Postgres.
+    Каналы слушаются на отдельном соединении. Оповещения, пришедшие во время
+    работы обработчика, объединяются в один повторный вызов. После переподключения
+    обработчики всех каналов вызываются сразу: оповещения за время разрыва потеряны.
+    """
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[asyncpg.Connection]],
+        interval: float = 30
+    ) -> None:
+        self.connect = connect
+        self.interval = interval
+        self._handlers: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._pending: set[str] = set()
+
+    def on(self, channel: str, handler: Callable[[], Awaitable[None]]) -> None:
+        self._handlers[channel] = handler
+
+    async def run(self) -> None:
+        connected_before = False
+        while True:
+            conn = None
+            try:
+                conn = await self.connect()
+                for channel in self._handlers:
+                    await conn.add_listener(channel, self._on_notify)
+                if connected_before:
+                    for channel in self._handlers:
+                        self.dispatch(channel)
+                connected_before = True
+                while True:
+                    await asyncio.sleep(self.interval)
+                    # Проверяем, что соединение с подписками живо
+                    await conn.fetchval("SELECT 1;")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning("Ошибка подписки на оповещения: %s", e)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(5)
+
+    def _on_notify(self, conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        if payload != NOTIFY_SENDER:
+            self.dispatch(channel)
+
+    def dispatch(self, channel: str) -> None:
+        if channel in self._running:
+            self._pending.add(channel)
+            return
+        self._running[channel] = asyncio.create_task(self._handle(channel))
+
+    async def _handle(self, channel: str) -> None:
+        try:
+            while True:
+                self._pending.discard(channel)
+                try:
+                    await self._handlers[channel]()
+                except Exception as e:
+                    logger.error("Ошибка обработки оповещения %s: %s", channel, e, exc_info=True)
+                if channel not in self._pending:
+                    return
+        finally:
+            del self._running[channel]
+
+
+def run_cluster(
+    workers: int,
+    target: Callable[[int, Queue, Queue], None],
+    token: str,
+    log_queue: Queue
+) -> None:
+    """
+    Запускает workers процессов-обработчиков и раздаёт им апдейты.
+    Процессы получают свою очередь апдейтов и общую очередь логов.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    queues = [ctx.Queue() for _ in range(workers)]
+    processes = [
+        ctx.Process(target=target, args=(index, queue, log_queue), name=f'bot-worker-{index}')
+        for index, queue in enumerate(queues)
+    ]
+    for process in processes:
+        process.start()
+    logger.info("Запущено процессов-обработчиков: %s.", workers)
+
+    try:
+        asyncio.run(poll_and_route(token, queues))
+    finally:
+        for queue in queues:
+            queue.put(None)
+        for process in processes:
+            process.join()
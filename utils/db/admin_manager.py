@@ -3,6 +3,9 @@ import logging
 from typing import Any, Dict, List
 
 
+logger = logging.getLogger(__name__)
+
+
 class AdminManager:
     def __init__(self, pool):
         self.pool = pool
@@ -17,10 +20,10 @@ class AdminManager:
         """
         try:
             await self.pool.execute(query, user_id, data.get('message'), data.get('photo'))
-            logging.info(f"Сообщение поддержки от пользователя {user_id} добавлено.")
+            logger.info("Сообщение поддержки от пользователя %s добавлено.", user_id)
             return 'Отправил. Ожидайте ответа.'
         except Exception as e:
-            logging.error(f"Ошибка при отправке сообщения поддержки: {e}")
+            logger.error("Ошибка при отправке сообщения поддержки: %s", e)
             return 'Произошла ошибка, попробуйте позже.'
         
     async def get_count_support_message(self) -> int:
@@ -30,12 +33,12 @@ class AdminManager:
         result = await self.pool.fetchval(
             "SELECT COUNT(id) FROM support_message WHERE status!='закрыт'"
         )
-        logging.info(f"Количество незакрытых сообщений поддержки: {result}")
+        logger.info("Количество незакрытых сообщений поддержки: %s", result)
         return result
     
     async def get_admin_ids(self) -> List:
         result = await self.pool.fetch(
             "SELECT user_id FROM users WHERE role='admin';"
         )
-        logging.info(f"Список администраторов: {result}")
+        logger.info("Список администраторов: %s", result)
         return result
\ No newline at end of file
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Признак отсутствия значения в кэше (None — допустимое значение)
+MISSING = object()
+
+
+def seconds_until_midnight() -> float:
+    """
+    Возвращает количество секунд до ближайшей локальной полуночи.
+    """
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds()
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+
+
+class TTLCache:
+    """
+    Кэш результатов асинхронного метода с TTL.
+
+    - ttl — время жизни записи в секундах;
+    - until_midnight — запись истекает не позже ближайшей локальной полуночи;
+    - stale_ttl — сколько секунд после истечения можно отдавать устаревшее
+      значение, пока в фоне идёт одно обновление.
+    Одновременные промахи по одному ключу объединяются в один запрос.
+    Результат загрузки, начатой до invalidate()/clear(), не сохраняется.
+    """
+    def __init__(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        ttl: Optional[float],
+        until_midnight: bool,
+        stale_ttl: float,
+        maxsize: int
+    ) -> None:
+        self.func = func
+        self.ttl = ttl
+        self.until_midnight = until_midnight
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+
+        self._data: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Task] = {}
+        self._refreshing: set[asyncio.Task] = set()
+        self.stats = {
+            'hits': 0, 'stale_hits': 0, 'misses': 0,
+            'coalesced': 0, 'refreshes': 0, 'errors': 0
+        }
+
+    def _expires_at(self) -> float:
+        lifetime = self.ttl if self.ttl is not None else float('inf')
+        if self.until_midnight:
+            lifetime = min(lifetime, seconds_until_midnight())
+        return time.monotonic() + lifetime
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._data[key] = CacheEntry(value, self._expires_at())
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def _load(self, key: Hashable, instance: Any, args: tuple, kwargs: dict) -> Any:
+        task = self._pending.get(key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+        else:
+            # Загрузка идёт в своей задаче: отмена вызывающего не отменяет её
+            # для остальных ожидающих этого ключа
+            task = asyncio.create_task(self._fetch(key, instance, args, kwargs))
+            self._pending[key] = task
+            task.add_done_callback(self._loaded)
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: Hashable, instance: Any, args: tuple, kwargs: dict) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await self.func(instance, *args, **kwargs)
+        except BaseException:
+            if self._pending.get(key) is task:
+                del self._pending[key]
+            raise
+
+        # invalidate()/clear() во время загрузки убирают её из _pending:
+        # значение могло быть прочитано до записи и в кэш не попадает
+        if self._pending.get(key) is task:
+            del self._pending[key]
+            self._store(key, value)
+        return value
+
+    @staticmethod
+    def _loaded(task: asyncio.Task) -> None:
+        # Исключение уже отдано ожидающим, но их может не остаться
+        if not task.cancelled():
+            task.exception()
+
+    async def _refresh(self, key: Hashable, instance: Any, args: tuple, kwargs: dict) -> None:
+        self.stats['refreshes'] += 1
+        try:
+            await self._load(key, instance, args, kwargs)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error("Ошибка фонового обновления кэша %s: %s", self.func.__qualname__, e)
+
+    async def get(self, instance: Any, args: tuple, kwargs: dict) -> Any:
+        key = (args, tuple(sorted(kwargs.items())))
+        entry = self._data.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            if now < entry.expires_at:
+                self.stats['hits'] += 1
+                self._data.move_to_end(key)
+                return entry.value
+
+            if now < entry.expires_at + self.stale_ttl:
+                self.stats['stale_hits'] += 1
+                if key not in self._pending:
+                    task = asyncio.create_task(self._refresh(key, instance, args, kwargs))
+                    self._refreshing.add(task)
+                    task.add_done_callback(self._refreshing.discard)
+                return entry.value
+
+        self.stats['misses'] += 1
+        return await self._load(key, instance, args, kwargs)
+
+    def invalidate(self, *args, **kwargs) -> bool:
+        key = (args, tuple(sorted(kwargs.items())))
+        # Следующий вызов начнёт новую загрузку, а не присоединится к идущей
+        self._pending.pop(key, None)
+        return self._data.pop(key, None) is not None
+
+    def peek(self, *args, **kwargs) -> Any:
+        """
+        Возвращает свежее значение без обращения к функции или MISSING.
+        В статистику не попадает: это проверка, а не запрос данных.
+        """
+        entry = self._data.get((args, tuple(sorted(kwargs.items()))))
+        if entry is None or time.monotonic() >= entry.expires_at:
+            return MISSING
+        return entry.value
+
+    def put(self, value: Any, *args, **kwargs) -> None:
+        """
+        Сохраняет значение, полученное в обход функции (например, батчем).
+        """
+        self._store((args, tuple(sorted(kwargs.items()))), value)
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._data.clear()
+
+    def info(self) -> Dict[str, int]:
+        return {**self.stats, 'size': len(self._data)}
+
+    def dump(self) -> List[Tuple[Hashable, Any, float]]:
+        """
+        Возвращает живые записи как (ключ, значение, оставшийся TTL).
+        """
+        now = time.monotonic()
+        return [
+            (key, entry.value, entry.expires_at - now)
+            for key, entry in self._data.items()
+            if entry.expires_at > now
+        ]
+
+    def load(self, items: List[Tuple[Hashable, Any, float]], elapsed: float = 0) -> int:
+        """
+        Восстанавливает записи из dump(), вычитая прошедшее время из TTL.
+        """
+        now = time.monotonic()
+        loaded = 0
+        for key, value, ttl_left in items:
+            if ttl_left - elapsed > 0:
+                self._data[key] = CacheEntry(value, now + ttl_left - elapsed)
+                loaded += 1
+        return loaded
+
+
+def ttl_cache(
+    ttl: Optional[float] = None,
+    *,
+    until_midnight: bool = False,
+    stale_ttl: float = 60,
+    maxsize: int = 128
+):
+    """
+    Декоратор кэша для методов Database с TTL и stale-while-revalidate.
+    Аргумент self в ключ не входит, API совместим с alru_cache:
+    cache_invalidate(*args), cache_clear() и дополнительно cache_stats().
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        cache = TTLCache(func, ttl, until_midnight, stale_ttl, maxsize)
+
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            return await cache.get(self, args, kwargs)
+
+        wrapper.cache_invalidate = cache.invalidate
+        wrapper.cache_clear = cache.clear
+        wrapper.cache_peek = cache.peek
+        wrapper.cache_put = cache.put
+        wrapper.cache_stats = cache.info
+        wrapper.cache_dump = cache.dump
+        wrapper.cache_load = cache.load
+        return wrapper
+
+    return decorator
+
+
+def cached_methods(obj: Any) -> Dict[str, Callable]:
+    """
+    Возвращает кэшированные методы объекта по именам.
+    """
+    methods = {}
+    for name in dir(type(obj)):
+        method = getattr(type(obj), name, None)
+        if callable(getattr(method, 'cache_stats', None)):
+            methods[name] = method
+    return methods
+
+
+def collect_cache_stats(obj: Any) -> Dict[str, Dict[str, int]]:
+    """
+    Собирает статистику всех кэшированных методов объекта.
+    """
+    return {name: method.cache_stats() for name, method in cached_methods(obj).items()}
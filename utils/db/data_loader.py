@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Mapping, Optional, TypeVar
+
+from utils.db.cache import MISSING
+from utils.db.main import Database
+
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Собирает ключи, запрошенные в одной итерации цикла событий,
+    и загружает их одним вызовом batch_fn. Повторный запрос ключа
+    отдаёт уже полученный результат.
+    """
+    def __init__(self, batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]]) -> None:
+        self.batch_fn = batch_fn
+        self._futures: Dict[K, asyncio.Future] = {}
+        self._queue: List[K] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> Optional[V]:
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                loop.call_soon(self._dispatch)
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        task = asyncio.create_task(self._run(keys))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, keys: List[K]) -> None:
+        try:
+            result = await self.batch_fn(keys)
+        except Exception as e:
+            for key in keys:
+                # Ошибку не запоминаем: следующий запрос ключа повторит загрузку
+                future = self._futures.pop(key)
+                future.set_exception(e)
+                future.exception()
+        else:
+            for key in keys:
+                self._futures[key].set_result(result.get(key))
+
+
+class DataLoader:
+    """
+    Загрузчик данных одного апдейта. Запросы, сделанные обработчиком
+    одновременно, объединяются в один запрос к БД с ANY($1)/unnest,
+    готовые значения берутся из кэшей Database и снимка расписания.
+    """
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self._users = BatchLoader(db.get_users)
+        self._schedules = BatchLoader(db.get_schedules)
+        self._users_schedules = BatchLoader(db.get_users_schedules)
+
+    async def get_user(self, user_id: int) -> Optional[Mapping[str, Any]]:
+        user = self.db.get_user_info.cache_peek(user_id)
+        if user is MISSING:
+            user = await self._users.load(user_id)
+        return user
+
+    async def user_exists(self, user_id: int) -> bool:
+        return await self.get_user(user_id) is not None
+
+    async def get_group(self, user_id: int) -> Optional[str]:
+        group_name = self.db.get_group.cache_peek(user_id)
+        if group_name is MISSING:
+            user = await self.get_user(user_id)
+            group_name = user['group_name'] if user else None
+        return group_name
+
+    async def get_schedule(self, group_name: str, day: date) -> Optional[Mapping[str, Any]]:
+        snapshot = self.db.snapshot
+        if snapshot is not None and snapshot.covers(day):
+            return snapshot.get(group_name, day)
+
+        schedule = self.db._fetch_schedule_by_group.cache_peek(group_name, day)
+        if schedule is MISSING:
+            schedule = await self._schedules.load((group_name, day))
+        return schedule
+
+    async def get_user_schedule(
+        self,
+        user_id: int,
+        day: date
+    ) -> tuple[Optional[str], Optional[Mapping[str, Any]]]:
+        """
+        Возвращает группу пользователя и её расписание на дату
+        не больше чем за один запрос к БД.
+        """
+        snapshot = self.db.snapshot
+        group_name = self.db.get_group.cache_peek(user_id)
+
+        if group_name is MISSING and not (snapshot is not None and snapshot.covers(day)):
+            user, schedule = await self._users_schedules.load((user_id, day))
+            return (user['group_name'] if user else None), schedule
+
+        group_name = await self.get_group(user_id)
+        return group_name, await self.get_schedule(group_name, day)
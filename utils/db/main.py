@@ -7,88 +7,106 @@ from asyncpg import Pool
 from utils.db.user_service import UserService
 from utils.db.schedule_manager import ScheduleManager
 from utils.db.admin_manager import AdminManager
+from utils.db.partition_manager import PartitionManager
+from utils.db.parser_run_manager import ParserRunManager
+from utils.db.usage_manager import UsageManager
+from utils.db.settings_manager import SettingsManager
+from utils.db.migrator import Migrator
+from utils.db.cache import collect_cache_stats
+from utils.db.replica import ReadRouter
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
+logger = logging.getLogger(__name__)
 
 
 class Database(
     UserService,
     ScheduleManager,
-    AdminManager
+    AdminManager,
+    PartitionManager,
+    ParserRunManager,
+    UsageManager,
+    SettingsManager
 ):
     def __init__(self, pool: Pool = None):
         self.pool = pool
+        self.read = ReadRouter(pool)
         super().__init__(self.pool)
 
-    async def connect(self) -> None:
-        """
-        Устанавливает подключение к базе данных.
-        """
-        self.pool = await asyncpg.create_pool(
+    @staticmethod
+    def _connect_kwargs() -> dict:
+        return dict(
             host=getenv('DB_HOST'),
             database=getenv('DB_DATABASE'),
             user=getenv('DB_USER'),
             password=getenv("DB_PASSWORD")
         )
 
+    async def connect(self) -> None:
+        """
+        Устанавливает подключение к базе данных.
+        """
+        self.pool = await asyncpg.create_pool(**self._connect_kwargs())
+
         super().__init__(self.pool)
 
-        logging.info("Подключение к базе данных установлено.")
+        logger.info("Подключение к базе данных установлено.")
 
-    async def create_and_check_table(self) -> None:
+        self.read = ReadRouter(
+            self.pool,
+            await self._connect_replica(),
+            max_lag=float(getenv('DB_REPLICA_MAX_LAG', 5)),
+            sticky=float(getenv('DB_REPLICA_STICKY', 10))
+        )
+        if self.read.replica is not None:
+            await self.read.check_lag()
+            self.read.start()
+
+    @staticmethod
+    async def _connect_replica() -> Pool | None:
+        """
+        Создаёт пул реплики для чтения, если задан DB_REPLICA_DSN.
+        Если реплика недоступна, бот работает только с primary.
         """
-        Создаёт таблицы, если они не существуют.
+        dsn = getenv('DB_REPLICA_DSN')
+        if not dsn:
+            return None
+        try:
+            pool = await asyncpg.create_pool(dsn, timeout=10)
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.warning("Не удалось подключиться к реплике, чтение идёт с primary: %s", e)
+            return None
+        logger.info("Подключение к реплике установлено.")
+        return pool
+
+    async def create_connection(self) -> asyncpg.Connection:
         """
-        query = """
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            user_id BIGINT UNIQUE,
-            group_name VARCHAR(100),
-            status VARCHAR(50) DEFAULT 'active',
-            signup_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        CREATE TABLE IF NOT EXISTS support_message (
-            id SERIAL PRIMARY KEY,
-            user_id BIGINT,
-            message VARCHAR (4096),
-            photo TEXT[],
-            status VARCHAR DEFAULT 'ожидание ответа',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        CREATE TABLE IF NOT EXISTS schedules (
-            id SERIAL PRIMARY KEY,
-            group_name VARCHAR(13),
-            date DATE,
-            weekday TEXT,
-            formation VARCHAR,
-            alert VARCHAR,
-            start_at VARCHAR(5),
-            subjects JSONB
-        );
+        Открывает отдельное соединение вне пула (для сессионных блокировок и LISTEN).
         """
-        await self.pool.execute(query)
-        logging.info("Таблицы проверены/созданы.")
+        return await asyncpg.connect(**self._connect_kwargs())
 
-        index_query = """
-        CREATE INDEX IF NOT EXISTS idx_users_user_id ON users(user_id);
-        CREATE INDEX IF NOT EXISTS idx_schedules_date ON schedules(date);
-        CREATE UNIQUE INDEX IF NOT EXISTS idx_schedules_group_date_unique ON schedules(group_name, date);
+    async def migrate(self) -> None:
         """
+        Приводит схему базы данных к актуальной версии.
+        """
+        await Migrator(self.pool).migrate()
 
-        await self.pool.execute(index_query)
-        logging.info("Индексы проверены/созданы.")
+    def get_cache_stats(self) -> dict:
+        """
+        Возвращает статистику попаданий в кэш по методам.
+        """
+        return collect_cache_stats(self)
+
+    def get_replica_stats(self) -> dict:
+        """
+        Возвращает состояние реплики и число запросов к ней и к primary.
+        """
+        return self.read.info()
 
     async def close(self) -> None:
         """
-        Закрывает пул соединений.
+        Закрывает пулы соединений.
         """
+        await self.read.close()
         await self.pool.close()
-        logging.info("Подключение к базе данных закрыто.")
\ No newline at end of file
+        logger.info("Подключение к базе данных закрыто.")
\ No newline at end of file
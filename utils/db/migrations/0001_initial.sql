@@ -0,0 +1,29 @@
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT UNIQUE,
+    group_name VARCHAR(100),
+    status VARCHAR(50) DEFAULT 'active',
+    signup_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS support_message (
+    id SERIAL PRIMARY KEY,
+    user_id BIGINT,
+    message VARCHAR (4096),
+    photo TEXT[],
+    status VARCHAR DEFAULT 'ожидание ответа',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS schedules (
+    id SERIAL PRIMARY KEY,
+    group_name VARCHAR(13),
+    date DATE,
+    weekday TEXT,
+    formation VARCHAR,
+    alert VARCHAR,
+    start_at VARCHAR(5),
+    subjects JSONB
+);
+
+CREATE INDEX IF NOT EXISTS idx_users_user_id ON users(user_id);
+CREATE INDEX IF NOT EXISTS idx_schedules_date ON schedules(date);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_schedules_group_date_unique ON schedules(group_name, date);
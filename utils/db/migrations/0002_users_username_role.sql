@@ -0,0 +1,2 @@
+ALTER TABLE users ADD COLUMN IF NOT EXISTS username VARCHAR(64);
+ALTER TABLE users ADD COLUMN IF NOT EXISTS role VARCHAR(20) DEFAULT 'user';
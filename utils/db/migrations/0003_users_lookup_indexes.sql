@@ -0,0 +1,3 @@
+-- no-transaction
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_username ON users(username);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_admins ON users(user_id) WHERE role = 'admin';
@@ -0,0 +1,53 @@
+CREATE SCHEMA IF NOT EXISTS schedules_archive;
+
+CREATE OR REPLACE FUNCTION ensure_schedules_partition(day DATE) RETURNS TEXT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', day)::date;
+    partition_name TEXT := format('schedules_y%sm%s', to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+BEGIN
+    IF to_regclass(format('public.%I', partition_name)) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE public.%I PARTITION OF public.schedules FOR VALUES FROM (%L) TO (%L)',
+            partition_name, month_start, (month_start + INTERVAL '1 month')::date
+        );
+    END IF;
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE schedules RENAME TO schedules_legacy;
+ALTER TABLE schedules_legacy RENAME CONSTRAINT schedules_pkey TO schedules_legacy_pkey;
+ALTER INDEX IF EXISTS idx_schedules_date RENAME TO idx_schedules_legacy_date;
+ALTER INDEX IF EXISTS idx_schedules_group_date_unique RENAME TO idx_schedules_legacy_group_date_unique;
+ALTER TABLE schedules_legacy ALTER COLUMN id DROP DEFAULT;
+ALTER SEQUENCE schedules_id_seq OWNED BY NONE;
+
+CREATE TABLE schedules (
+    id INTEGER NOT NULL DEFAULT nextval('schedules_id_seq'),
+    group_name VARCHAR(13),
+    date DATE NOT NULL,
+    weekday TEXT,
+    formation VARCHAR,
+    alert VARCHAR,
+    start_at VARCHAR(5),
+    subjects JSONB
+) PARTITION BY RANGE (date);
+
+ALTER SEQUENCE schedules_id_seq OWNED BY schedules.id;
+
+SELECT ensure_schedules_partition(month::date)
+FROM generate_series(
+    date_trunc('month', LEAST(COALESCE((SELECT MIN(date) FROM schedules_legacy), CURRENT_DATE), CURRENT_DATE)),
+    date_trunc('month', GREATEST(COALESCE((SELECT MAX(date) FROM schedules_legacy), CURRENT_DATE), CURRENT_DATE + INTERVAL '2 month')),
+    INTERVAL '1 month'
+) AS month;
+
+CREATE INDEX idx_schedules_date ON schedules(date);
+CREATE UNIQUE INDEX idx_schedules_group_date_unique ON schedules(group_name, date);
+
+INSERT INTO schedules (id, group_name, date, weekday, formation, alert, start_at, subjects)
+SELECT id, group_name, date, weekday, formation, alert, start_at, subjects
+FROM schedules_legacy
+WHERE date IS NOT NULL;
+
+DROP TABLE schedules_legacy;
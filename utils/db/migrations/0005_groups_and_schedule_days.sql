@@ -0,0 +1,28 @@
+CREATE TABLE IF NOT EXISTS groups (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(13) UNIQUE NOT NULL,
+    display_order INTEGER NOT NULL,
+    first_seen DATE,
+    last_seen DATE
+);
+
+CREATE TABLE IF NOT EXISTS schedule_days (
+    date DATE PRIMARY KEY,
+    weekday TEXT,
+    alert VARCHAR,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO groups (name, display_order, first_seen, last_seen)
+SELECT group_name, ROW_NUMBER() OVER (ORDER BY MIN(id)), MIN(date), MAX(date)
+FROM schedules
+WHERE group_name IS NOT NULL
+GROUP BY group_name
+ORDER BY MIN(id)
+ON CONFLICT (name) DO NOTHING;
+
+INSERT INTO schedule_days (date, weekday, alert)
+SELECT date, MIN(weekday), MAX(alert)
+FROM schedules
+GROUP BY date
+ON CONFLICT (date) DO NOTHING;
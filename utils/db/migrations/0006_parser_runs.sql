@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS parser_runs (
+    id SERIAL PRIMARY KEY,
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    changed BOOLEAN NOT NULL,
+    digest VARCHAR(64)
+);
+
+CREATE INDEX IF NOT EXISTS idx_parser_runs_started_at ON parser_runs(started_at);
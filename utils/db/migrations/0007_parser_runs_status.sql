@@ -0,0 +1,5 @@
+ALTER TABLE parser_runs ADD COLUMN IF NOT EXISTS trigger VARCHAR(20);
+ALTER TABLE parser_runs ADD COLUMN IF NOT EXISTS status VARCHAR(10) NOT NULL DEFAULT 'ok';
+ALTER TABLE parser_runs ADD COLUMN IF NOT EXISTS duration REAL;
+ALTER TABLE parser_runs ADD COLUMN IF NOT EXISTS records INTEGER;
+ALTER TABLE parser_runs ADD COLUMN IF NOT EXISTS error TEXT;
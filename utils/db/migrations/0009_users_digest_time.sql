@@ -0,0 +1,3 @@
+ALTER TABLE users ADD COLUMN IF NOT EXISTS digest_time TIME;
+
+CREATE INDEX IF NOT EXISTS idx_users_digest_time ON users(digest_time, group_name) WHERE digest_time IS NOT NULL;
@@ -0,0 +1,16 @@
+CREATE TABLE IF NOT EXISTS usage_counters (
+    minute TIMESTAMP NOT NULL,
+    group_name VARCHAR(13),
+    date DATE,
+    action VARCHAR(32) NOT NULL,
+    count INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_usage_counters_minute ON usage_counters(minute);
+
+CREATE TABLE IF NOT EXISTS user_activity (
+    user_id BIGINT PRIMARY KEY,
+    last_seen TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_activity_last_seen ON user_activity(last_seen);
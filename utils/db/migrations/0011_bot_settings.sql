@@ -0,0 +1,5 @@
+CREATE TABLE IF NOT EXISTS bot_settings (
+    key VARCHAR(64) PRIMARY KEY,
+    value TEXT,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1 @@
+ALTER TABLE parser_runs ADD COLUMN IF NOT EXISTS date_digests JSONB;
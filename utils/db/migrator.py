@@ -0,0 +1,115 @@
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+import asyncpg
+from asyncpg import Pool
+
+
+logger = logging.getLogger(__name__)
+
+
+MIGRATIONS_DIR = Path(__file__).parent / 'migrations'
+
+# Миграции с этой пометкой в первой строке выполняются вне транзакции
+# по одной команде (нужно для CREATE INDEX CONCURRENTLY)
+NO_TRANSACTION = '-- no-transaction'
+
+# Ключ advisory lock, чтобы миграции не запускались параллельно
+MIGRATION_LOCK_ID = 7_240_001
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION)
+
+    def statements(self) -> List[str]:
+        return [stmt.strip() for stmt in self.sql.split(';') if stmt.strip()]
+
+
+def load_migrations(path: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """
+    Загружает файлы миграций вида 0001_name.sql в порядке версий.
+    """
+    migrations = []
+    for file in sorted(path.glob('*.sql')):
+        match = re.match(r'(\d+)_(.+)\.sql$', file.name)
+        if not match:
+            continue
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            sql=file.read_text(encoding='utf-8')
+        ))
+    return migrations
+
+
+class Migrator:
+    def __init__(self, pool: Pool, migrations: List[Migration] = None):
+        self.pool = pool
+        self.migrations = migrations if migrations is not None else load_migrations()
+
+    @property
+    def latest_version(self) -> int:
+        return max((m.version for m in self.migrations), default=0)
+
+    async def current_version(self) -> int:
+        """
+        Возвращает текущую версию схемы (0, если миграции ещё не применялись).
+        """
+        try:
+            return await self.pool.fetchval(
+                "SELECT COALESCE(MAX(version), 0) FROM schema_version;"
+            )
+        except asyncpg.UndefinedTableError:
+            return 0
+
+    async def migrate(self) -> None:
+        """
+        Применяет недостающие миграции. Если схема актуальна, DDL не выполняется.
+        """
+        if await self.current_version() >= self.latest_version:
+            logger.info("Схема базы данных актуальна.")
+            return
+
+        async with self.pool.acquire() as conn:
+            await conn.execute("SELECT pg_advisory_lock($1);", MIGRATION_LOCK_ID)
+            try:
+                await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                """)
+                # Версию перечитываем под блокировкой: другой процесс мог успеть раньше
+                current = await conn.fetchval(
+                    "SELECT COALESCE(MAX(version), 0) FROM schema_version;"
+                )
+                for migration in self.migrations:
+                    if migration.version > current:
+                        await self._apply(conn, migration)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1);", MIGRATION_LOCK_ID)
+
+    async def _apply(self, conn: asyncpg.Connection, migration: Migration) -> None:
+        record_query = "INSERT INTO schema_version (version, name) VALUES ($1, $2);"
+
+        if migration.transactional:
+            async with conn.transaction():
+                await conn.execute(migration.sql)
+                await conn.execute(record_query, migration.version, migration.name)
+        else:
+            for statement in migration.statements():
+                await conn.execute(statement)
+            await conn.execute(record_query, migration.version, migration.name)
+
+        logger.info("Применена миграция %04d_%s.", migration.version, migration.name)
@@ -0,0 +1,60 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+from asyncpg import Pool
+
+
+logger = logging.getLogger(__name__)
+
+
+class ParserRunManager:
+    def __init__(self, pool: Pool):
+        self.pool = pool
+
+    async def add_parser_run(self, run: Any) -> None:
+        """
+        Сохраняет результат запуска парсера (IngestResult).
+        """
+        query = """
+        INSERT INTO parser_runs (started_at, trigger, status, duration, records, changed, digest, date_digests, error)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9);
+        """
+        date_digests = json.dumps(run.date_digests) if run.date_digests is not None else None
+        await self.pool.execute(
+            query, run.started_at, run.trigger, run.status, run.duration,
+            run.records, run.changed, run.digest, date_digests, run.error
+        )
+        logger.info("Запуск парсера записан: %s, изменения: %s.", run.status, run.changed)
+
+    async def get_last_parser_run(self) -> Optional[asyncpg.Record]:
+        """
+        Возвращает последний запуск парсера.
+        """
+        return await self.pool.fetchrow(
+            "SELECT * FROM parser_runs ORDER BY started_at DESC LIMIT 1;"
+        )
+
+    async def get_last_parser_digests(self) -> Dict[str, str]:
+        """
+        Возвращает отпечатки дат из последнего запуска парсера, где они сохранены.
+        """
+        value = await self.pool.fetchval(
+            "SELECT date_digests FROM parser_runs WHERE date_digests IS NOT NULL ORDER BY started_at DESC LIMIT 1;"
+        )
+        return json.loads(value) if value else {}
+
+    async def get_parser_change_hours(self, days: int = 28) -> List[asyncpg.Record]:
+        """
+        Возвращает по часам суток число запусков и число запусков с изменениями.
+        """
+        query = """
+        SELECT EXTRACT(HOUR FROM started_at)::INT AS hour,
+               COUNT(*) AS runs,
+               COUNT(*) FILTER (WHERE changed) AS changes
+        FROM parser_runs
+        WHERE status = 'ok' AND started_at >= CURRENT_TIMESTAMP - make_interval(days => $1)
+        GROUP BY hour;
+        """
+        return await self.pool.fetch(query, days)
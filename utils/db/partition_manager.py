@@ -0,0 +1,157 @@
+import asyncio
+import gzip
+import logging
+import re
+import shutil
+from datetime import date
+from os import getenv
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from asyncpg import Pool
+
+
+logger = logging.getLogger(__name__)
+
+
+ARCHIVE_SCHEMA = 'schedules_archive'
+PARTITION_NAME = re.compile(r'^schedules_y(\d{4})m(\d{2})$')
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def shift_month(day: date, months: int) -> date:
+    """
+    Сдвигает первое число месяца на указанное количество месяцев.
+    """
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_month(name: str) -> Optional[date]:
+    """
+    Возвращает месяц партиции по её имени (schedules_y2025m03).
+    """
+    match = PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def _gzip_file(source: Path) -> Path:
+    target = source.with_suffix(source.suffix + '.gz')
+    with open(source, 'rb') as src, gzip.open(target, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    source.unlink()
+    return target
+
+
+class PartitionManager:
+    def __init__(self, pool: Pool):
+        self.pool = pool
+
+    async def ensure_schedule_partitions(self, days: Iterable[date]) -> None:
+        """
+        Создаёт помесячные партиции schedules для указанных дат, если их ещё нет.
+        """
+        months = sorted({month_start(day) for day in days})
+        if months:
+            await self.pool.executemany(
+                "SELECT ensure_schedules_partition($1);",
+                [(month,) for month in months]
+            )
+
+    async def get_schedule_partitions(self, archived: bool = False) -> List[str]:
+        """
+        Возвращает имена подключённых (горячих) или архивных партиций schedules.
+        """
+        if archived:
+            query = "SELECT tablename FROM pg_tables WHERE schemaname = $1;"
+            records = await self.pool.fetch(query, ARCHIVE_SCHEMA)
+        else:
+            query = """
+            SELECT c.relname AS tablename
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'public.schedules'::regclass;
+            """
+            records = await self.pool.fetch(query)
+
+        return sorted(
+            record['tablename'] for record in records
+            if partition_month(record['tablename'])
+        )
+
+    async def archive_schedule_partitions(self, hot_months: int) -> List[str]:
+        """
+        Отключает от schedules партиции старше hot_months месяцев и переносит их в архив.
+        """
+        cutoff = shift_month(month_start(date.today()), -hot_months)
+        archived = []
+
+        for name in await self.get_schedule_partitions():
+            if partition_month(name) >= cutoff:
+                continue
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(f'ALTER TABLE public.schedules DETACH PARTITION public."{name}";')
+                    await conn.execute(f'ALTER TABLE public."{name}" SET SCHEMA {ARCHIVE_SCHEMA};')
+            archived.append(name)
+            logger.info("Партиция %s перенесена в архив.", name)
+
+        return archived
+
+    async def drop_archived_partitions(
+        self,
+        retention_months: int,
+        export_dir: Optional[Path] = None
+    ) -> List[str]:
+        """
+        Удаляет архивные партиции старше retention_months месяцев.
+        Если указан export_dir, перед удалением сохраняет их в CSV, сжатый gzip.
+        """
+        cutoff = shift_month(month_start(date.today()), -retention_months)
+        dropped = []
+
+        for name in await self.get_schedule_partitions(archived=True):
+            if partition_month(name) >= cutoff:
+                continue
+
+            if export_dir is not None:
+                export_dir.mkdir(parents=True, exist_ok=True)
+                csv_path = export_dir / f'{name}.csv'
+                async with self.pool.acquire() as conn:
+                    await conn.copy_from_table(
+                        name, schema_name=ARCHIVE_SCHEMA,
+                        output=str(csv_path), format='csv', header=True
+                    )
+                archive = await asyncio.to_thread(_gzip_file, csv_path)
+                logger.info("Партиция %s выгружена в %s.", name, archive)
+
+            await self.pool.execute(f'DROP TABLE {ARCHIVE_SCHEMA}."{name}";')
+            dropped.append(name)
+            logger.info("Архивная партиция %s удалена.", name)
+
+        return dropped
+
+    async def run_schedule_retention(self) -> None:
+        """
+        Обслуживание истории расписания: создаёт партиции наперёд,
+        переносит старые в архив и удаляет архив по сроку хранения.
+
+        Настраивается переменными окружения SCHEDULE_HOT_MONTHS,
+        SCHEDULE_RETENTION_MONTHS и SCHEDULE_EXPORT_DIR.
+        """
+        hot_months = int(getenv('SCHEDULE_HOT_MONTHS', 1))
+        retention_months = int(getenv('SCHEDULE_RETENTION_MONTHS', 12))
+        export_dir = getenv('SCHEDULE_EXPORT_DIR')
+
+        today = month_start(date.today())
+        await self.ensure_schedule_partitions(shift_month(today, i) for i in range(3))
+        await self.archive_schedule_partitions(hot_months)
+        await self.drop_archived_partitions(
+            max(retention_months, hot_months),
+            Path(export_dir) if export_dir else None
+        )
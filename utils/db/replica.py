@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+import asyncpg
+from asyncpg import Pool
+
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых реплика считается недоступной
+REPLICA_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.InterfaceError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError
+)
+
+LAG_QUERY = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END;
+"""
+
+
+class ReadRouter:
+    """
+    Направляет чтения на реплику, а записи и чтения сразу после записи — на primary.
+
+    - Реплика используется, пока её отставание не больше max_lag секунд;
+      отставание проверяется в фоне раз в check_interval секунд.
+    - После mark_written(key) чтения по этому ключу sticky секунд идут на primary.
+    - При ошибке соединения с репликой запрос повторяется на primary,
+      а реплика выключается до следующей успешной проверки.
+    """
+    def __init__(
+        self,
+        primary: Pool,
+        replica: Optional[Pool] = None,
+        max_lag: float = 5,
+        sticky: float = 10,
+        check_interval: float = 5
+    ) -> None:
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.sticky = sticky
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.stats = {'replica': 0, 'primary': 0, 'fallbacks': 0}
+        self._written: Dict[Hashable, float] = {}
+        self._monitor: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.replica is not None and self._monitor is None:
+            self._monitor = asyncio.create_task(self._monitor_lag())
+
+    async def close(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        if self.replica is not None:
+            await self.replica.close()
+
+    async def check_lag(self) -> None:
+        try:
+            self.lag = float(await self.replica.fetchval(LAG_QUERY, timeout=self.check_interval))
+        except (*REPLICA_ERRORS, asyncpg.PostgresError) as e:
+            if self.healthy:
+                logger.warning("Реплика недоступна, чтение идёт с primary: %s", e)
+            self.healthy, self.lag = False, None
+            return
+
+        healthy = self.lag <= self.max_lag
+        if healthy != self.healthy:
+            logger.info("Реплика %s (отставание %.1f с).", "включена" if healthy else "отключена", self.lag)
+        self.healthy = healthy
+
+    async def _monitor_lag(self) -> None:
+        while True:
+            await self.check_lag()
+            await asyncio.sleep(self.check_interval)
+
+    def mark_written(self, key: Hashable) -> None:
+        """
+        Отмечает запись по ключу: следующие чтения по нему пойдут на primary.
+        """
+        now = time.monotonic()
+        self._written[key] = now + self.sticky
+        if len(self._written) > 1024:
+            self._written = {k: until for k, until in self._written.items() if until > now}
+
+    def pool_for(self, *keys: Hashable) -> Pool:
+        if self.replica is None or not self.healthy:
+            return self.primary
+        now = time.monotonic()
+        if any(self._written.get(key, 0) > now for key in keys):
+            return self.primary
+        return self.replica
+
+    async def _run(self, method: str, query: str, args: tuple, keys: Iterable[Hashable]) -> Any:
+        pool = self.pool_for(*keys)
+        if pool is self.primary:
+            self.stats['primary'] += 1
+            return await getattr(pool, method)(query, *args)
+
+        try:
+            result = await getattr(pool, method)(query, *args)
+        except REPLICA_ERRORS as e:
+            self.healthy = False
+            self.stats['fallbacks'] += 1
+            logger.warning("Ошибка запроса к реплике, повтор на primary: %s", e)
+            return await getattr(self.primary, method)(query, *args)
+        self.stats['replica'] += 1
+        return result
+
+    async def fetch(
+        self,
+        query: str,
+        *args,
+        key: Hashable = None,
+        keys: Iterable[Hashable] = ()
+    ) -> List[asyncpg.Record]:
+        return await self._run('fetch', query, args, [key, *keys] if key is not None else keys)
+
+    async def fetchrow(
+        self,
+        query: str,
+        *args,
+        key: Hashable = None,
+        keys: Iterable[Hashable] = ()
+    ) -> Optional[asyncpg.Record]:
+        return await self._run('fetchrow', query, args, [key, *keys] if key is not None else keys)
+
+    async def fetchval(
+        self,
+        query: str,
+        *args,
+        key: Hashable = None,
+        keys: Iterable[Hashable] = ()
+    ) -> Any:
+        return await self._run('fetchval', query, args, [key, *keys] if key is not None else keys)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'enabled': self.replica is not None,
+            'healthy': self.healthy,
+            'lag': self.lag
+        }
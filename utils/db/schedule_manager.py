@@ -1,21 +1,38 @@
 import json
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Mapping, Optional
 from datetime import date
 
 import asyncpg
-from async_lru import alru_cache
 
 from utils.db.main import Pool
+from utils.db.cache import ttl_cache
+from utils.db.schedule_snapshot import ScheduleSnapshot
+from utils.db.settings_manager import SCHEDULE_CHANNEL
+
+
+logger = logging.getLogger(__name__)
+
+# Ключ записи расписания для ReadRouter: после загрузки расписание читается с primary
+SCHEDULE_KEY = 'schedule'
+
+# Группа остаётся в списках выбора столько дней после последних занятий
+GROUP_ACTIVE_DAYS = 180
 
 
 class ScheduleManager:
+    # Версия данных расписания, увеличивается при каждом обновлении
+    data_version: int = 0
+    # Снимок актуального расписания, заменяется целиком
+    _snapshot: Optional[ScheduleSnapshot] = None
+
     def __init__(self, pool: Pool):
         self.pool = pool
 
-    async def add_schedule(self, data: List[Dict[str, Dict[str, Any]]]) -> None:
+    async def add_schedule(self, data: List[Dict[str, Dict[str, Any]]], refresh: bool = True) -> None:
         """
         Добавляет или обновляет расписание батчем.
+        При refresh=False кэш и снимок не обновляются (это делает вызывающий).
         """
         query = """
         INSERT INTO schedules (group_name, date, weekday, formation, alert, start_at, subjects)
@@ -28,6 +45,23 @@ class ScheduleManager:
             start_at = EXCLUDED.start_at,
             subjects = EXCLUDED.subjects;
         """
+        groups_query = """
+        INSERT INTO groups (name, display_order, first_seen, last_seen)
+        VALUES ($1, (SELECT COALESCE(MAX(display_order), 0) + 1 FROM groups), $2, $3)
+        ON CONFLICT (name)
+        DO UPDATE SET
+            first_seen = LEAST(groups.first_seen, EXCLUDED.first_seen),
+            last_seen = GREATEST(groups.last_seen, EXCLUDED.last_seen);
+        """
+        days_query = """
+        INSERT INTO schedule_days (date, weekday, alert)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (date)
+        DO UPDATE SET
+            weekday = EXCLUDED.weekday,
+            alert = EXCLUDED.alert,
+            updated_at = CURRENT_TIMESTAMP;
+        """
 
         batch_data = []
         for schedule_data in data:
@@ -43,74 +77,276 @@ class ScheduleManager:
                         json.dumps(schedule["subjects"]),
                     ))
                 except KeyError as e:
-                    logging.error(f"Отсутствует ключ для группы {group_name}: {e}")
+                    logger.error("Отсутствует ключ для группы %s: %s", group_name, e)
+
+        # Группы в порядке первого появления и дни с их alert
+        groups: Dict[str, tuple] = {}
+        days: Dict[date, tuple] = {}
+        for group_name, day, weekday, _, alert, *_ in batch_data:
+            first_seen, last_seen = groups.get(group_name, (day, day))
+            groups[group_name] = (min(first_seen, day), max(last_seen, day))
+            if day not in days or alert:
+                days[day] = (weekday, alert)
 
         if batch_data:
+            await self.ensure_schedule_partitions(days)
             async with self.pool.acquire() as conn:
                 async with conn.transaction():
                     await conn.executemany(query, batch_data)
+                    await conn.executemany(groups_query, [
+                        (group_name, first_seen, last_seen)
+                        for group_name, (first_seen, last_seen) in groups.items()
+                    ])
+                    await conn.executemany(days_query, [
+                        (day, weekday, alert)
+                        for day, (weekday, alert) in days.items()
+                    ])
+            self.read.mark_written(SCHEDULE_KEY)
 
-        logging.info(f"Добавлено/обновлено {len(batch_data)} записей.")
+        logger.info("Добавлено/обновлено %s записей.", len(batch_data))
 
         # Очистка кэша после обновления данных
-        await self.clear_cache_schedule()
+        if refresh:
+            await self.clear_cache_schedule()
 
-    @alru_cache(maxsize=128)
-    async def get_groups_name(self) -> List[asyncpg.Record]:
+    async def load_snapshot(self) -> None:
         """
-        Возвращает список групп из расписания.
+        Загружает снимок расписания начиная с текущей даты одним запросом.
+        При ошибке продолжает работать с последним успешным снимком.
         """
-        logging.info("Получение названий групп из кэша или базы данных.")
-        return await self.pool.fetch(
-            "SELECT group_name, MIN(id) AS min_id FROM schedules GROUP BY group_name ORDER BY min_id;"
-        )
+        query = """
+        SELECT s.*, g.id AS group_id, g.display_order
+        FROM schedules s
+        JOIN groups g ON g.name = s.group_name
+        WHERE s.date >= $1
+        ORDER BY s.date, g.display_order;
+        """
+        start_date = date.today()
+        try:
+            records = await self.read.fetch(query, start_date, key=SCHEDULE_KEY)
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.error("Не удалось обновить снимок расписания, используется предыдущий: %s", e)
+            return
+
+        self._snapshot = ScheduleSnapshot.from_records(records, start_date)
+        logger.info("Снимок расписания обновлён, записей: %s.", len(records))
+
+    @property
+    def snapshot(self) -> Optional[ScheduleSnapshot]:
+        """
+        Текущий снимок расписания (None, если он ещё не загружен).
+        """
+        return self._snapshot
+
+    async def get_data_version(self) -> str:
+        """
+        Возвращает версию данных расписания в БД (время последнего изменения дней).
+        """
+        value = await self.pool.fetchval("SELECT MAX(updated_at) FROM schedule_days;")
+        return value.isoformat() if value else ''
+
+    def export_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает снимок расписания в виде простых структур для сохранения на диск.
+        """
+        if self._snapshot is None:
+            return None
+        return {
+            'start_date': self._snapshot.start_date,
+            'rows': [
+                dict(record.items())
+                for day in self._snapshot.dates
+                for record in self._snapshot.by_date[day]
+            ]
+        }
+
+    def install_snapshot(self, data: Dict[str, Any]) -> None:
+        """
+        Устанавливает снимок, сохранённый export_snapshot().
+        """
+        self._snapshot = ScheduleSnapshot.from_records(data['rows'], data['start_date'])
+        logger.info("Снимок расписания восстановлен с диска, записей: %s.", len(data['rows']))
+
+    async def get_groups_name(self) -> List[Mapping[str, Any]]:
+        """
+        Возвращает список групп из таблицы groups, включая группы
+        без занятий в горизонте снимка (например, на практике).
+        """
+        return list(await self._fetch_groups_name())
+
+    @ttl_cache(ttl=3600)
+    async def _fetch_groups_name(self) -> List[asyncpg.Record]:
+        logger.debug("Получение названий групп из базы данных.")
+        query = """
+        SELECT name AS group_name, id AS group_id
+        FROM groups
+        WHERE last_seen IS NULL OR last_seen >= CURRENT_DATE - make_interval(days => $1)
+        ORDER BY display_order;
+        """
+        return await self.read.fetch(query, GROUP_ACTIVE_DAYS, key=SCHEDULE_KEY)
+
+    async def get_group_name_by_id(self, group_id: int) -> str | None:
+        """
+        Возвращает название группы по её идентификатору из callback_data.
+        """
+        for record in await self.get_groups_name():
+            if record['group_id'] == group_id:
+                return record['group_name']
+        return None
 
-    @alru_cache(maxsize=128)
     async def get_schedule_date(self) -> List:
         """
         Получает доступные даты.
         """
-        logging.info("Получение доступных дат из кэша или базы данных.")
+        if self._snapshot is not None:
+            today = date.today()
+            return [{'date': day} for day in self._snapshot.dates if day >= today]
+        return await self._fetch_schedule_date()
+
+    @ttl_cache(ttl=7200, until_midnight=True)
+    async def _fetch_schedule_date(self) -> List[asyncpg.Record]:
+        logger.debug("Получение доступных дат из базы данных.")
         query = """
-        SELECT DISTINCT date 
-        FROM schedules 
-        WHERE date >= CURRENT_DATE 
+        SELECT date
+        FROM schedule_days
+        WHERE date >= CURRENT_DATE
         ORDER BY date;
         """
-        return await self.pool.fetch(query)
+        return await self.read.fetch(query, key=SCHEDULE_KEY)
 
-    @alru_cache(maxsize=128)
     async def get_schedule_by_group(self, group_name: str, date: date) -> Dict[str, Any]:
         """
         Получает расписание для указанной группы.
         """
-        logging.info(f"Получение расписания для группы {group_name} на {date} из кэша или базы данных.")
+        if self._snapshot is not None and self._snapshot.covers(date):
+            return self._snapshot.get(group_name, date)
+        return await self._fetch_schedule_by_group(group_name, date)
+
+    @ttl_cache(ttl=3600, maxsize=512)
+    async def _fetch_schedule_by_group(self, group_name: str, date: date) -> asyncpg.Record:
+        logger.debug("Получение расписания для группы %s на %s из базы данных.", group_name, date)
         query = """
         SELECT * FROM schedules 
         WHERE group_name=$1 AND date=$2;
         """
-        return await self.pool.fetchrow(query, group_name, date)
+        return await self.read.fetchrow(query, group_name, date, key=SCHEDULE_KEY)
+
+    async def get_schedule_range(self, group_name: str, start: date, end: date) -> List[Mapping[str, Any]]:
+        """
+        Получает расписание группы на все даты из диапазона.
+        """
+        if self._snapshot is not None and self._snapshot.covers(start):
+            days = self._snapshot.by_group.get(group_name, {})
+            return [days[day] for day in sorted(days) if start <= day <= end]
+        return await self._fetch_schedule_range(group_name, start, end)
+
+    @ttl_cache(ttl=3600, maxsize=256)
+    async def _fetch_schedule_range(self, group_name: str, start: date, end: date) -> List[asyncpg.Record]:
+        logger.debug("Получение расписания группы %s с %s по %s из базы данных.", group_name, start, end)
+        query = """
+        SELECT * FROM schedules
+        WHERE group_name = $1 AND date BETWEEN $2 AND $3
+        ORDER BY date;
+        """
+        return await self.read.fetch(query, group_name, start, end, key=SCHEDULE_KEY)
+
+    async def get_schedules(
+        self,
+        keys: List[tuple[str, date]]
+    ) -> Dict[tuple[str, date], Optional[asyncpg.Record]]:
+        """
+        Получает расписания по парам (группа, дата) одним запросом.
+        """
+        query = """
+        SELECT s.*
+        FROM unnest($1::varchar[], $2::date[]) AS k(group_name, date)
+        JOIN schedules s ON s.group_name = k.group_name AND s.date = k.date;
+        """
+        records = await self.read.fetch(
+            query, [group_name for group_name, _ in keys], [day for _, day in keys],
+            key=SCHEDULE_KEY
+        )
+        found = {(record['group_name'], record['date']): record for record in records}
+        result = {key: found.get(key) for key in keys}
+        for (group_name, day), record in result.items():
+            self._fetch_schedule_by_group.cache_put(record, group_name, day)
+        return result
+
+    async def get_users_schedules(
+        self,
+        keys: List[tuple[int, date]]
+    ) -> Dict[tuple[int, date], tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """
+        Получает пользователей вместе с расписанием их группы на дату одним запросом.
+        Возвращает пары (пользователь, расписание) и заполняет кэши.
+        """
+        query = """
+        SELECT k.date AS requested_date, u.*,
+            s.date AS s_date, s.weekday AS s_weekday, s.formation AS s_formation,
+            s.alert AS s_alert, s.start_at AS s_start_at, s.subjects AS s_subjects
+        FROM unnest($1::bigint[], $2::date[]) AS k(user_id, date)
+        JOIN users u ON u.user_id = k.user_id
+        LEFT JOIN schedules s ON s.group_name = u.group_name AND s.date = k.date;
+        """
+        records = await self.read.fetch(
+            query, [user_id for user_id, _ in keys], [day for _, day in keys],
+            key=SCHEDULE_KEY, keys=[('user', user_id) for user_id, _ in keys]
+        )
+
+        result = {key: (None, None) for key in keys}
+        for record in records:
+            user, schedule = {}, {}
+            for column, value in record.items():
+                if column.startswith('s_'):
+                    schedule[column[2:]] = value
+                elif column != 'requested_date':
+                    user[column] = value
+            schedule = {'group_name': user['group_name'], **schedule} if schedule['date'] else None
+            result[(user['user_id'], record['requested_date'])] = (user, schedule)
+
+        for (user_id, day), (user, schedule) in result.items():
+            self.cache_user(user_id, user)
+            if user is not None:
+                self._fetch_schedule_by_group.cache_put(schedule, user['group_name'], day)
+        return result
 
-    @alru_cache(maxsize=128)
     async def get_schedule_alert(self, date: date) -> List:
         """
         Получает alert для указанной даты.
         """
-        logging.info(f"Получение alert для {date} из кэша или базы данных.")
+        if self._snapshot is not None and self._snapshot.covers(date):
+            return self._snapshot.get_alert(date)
+        return await self._fetch_schedule_alert(date)
+
+    @ttl_cache(ttl=3600)
+    async def _fetch_schedule_alert(self, date: date) -> str:
+        logger.debug("Получение alert для %s из базы данных.", date)
         query = """
-        SELECT DISTINCT alert
-        FROM schedules 
-        WHERE date = $1
-        LIMIT 1;
+        SELECT alert
+        FROM schedule_days
+        WHERE date = $1;
         """
-        return await self.pool.fetchval(query, date)
+        return await self.read.fetchval(query, date, key=SCHEDULE_KEY)
 
     async def clear_cache_schedule(self):
         """
-        Очистка кэша после обновления данных.
+        Очистка кэша после обновления данных во всех процессах.
+        """
+        await self.reload_schedule()
+        await self.notify(SCHEDULE_CHANNEL)
+
+    async def reload_schedule(self):
+        """
+        Очистка кэша и перезагрузка снимка в текущем процессе.
         """
-        self.get_groups_name.cache_clear()
-        self.get_schedule_date.cache_clear()
-        self.get_schedule_by_group.cache_clear()
-        self.get_schedule_alert.cache_clear()
-        logging.info("Кэш очищен после обновления расписания.")
+        # Перезагрузка идёт сразу после записи (в том числе в другом процессе):
+        # реплика может её ещё не содержать, поэтому чтения — с primary
+        self.read.mark_written(SCHEDULE_KEY)
+        self._fetch_groups_name.cache_clear()
+        self._fetch_schedule_date.cache_clear()
+        self._fetch_schedule_by_group.cache_clear()
+        self._fetch_schedule_alert.cache_clear()
+        self._fetch_schedule_range.cache_clear()
+        await self.load_snapshot()
+        self.data_version += 1
+        logger.info("Кэш очищен после обновления расписания.")
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional, Tuple
+
+import asyncpg
+
+
+@dataclass(frozen=True)
+class ScheduleSnapshot:
+    """
+    Неизменяемый снимок актуального расписания.
+    Строится одним запросом и заменяется целиком после каждого обновления.
+    """
+    start_date: date
+    built_at: datetime
+    by_group: Mapping[str, Mapping[date, asyncpg.Record]]
+    by_date: Mapping[date, Tuple[asyncpg.Record, ...]]
+    groups: Tuple[Mapping[str, Any], ...]
+    dates: Tuple[date, ...]
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[asyncpg.Record],
+        start_date: date
+    ) -> 'ScheduleSnapshot':
+        by_group: dict[str, dict[date, asyncpg.Record]] = {}
+        by_date: dict[date, list[asyncpg.Record]] = {}
+        group_ids: dict[str, tuple[int, int]] = {}
+
+        for record in records:
+            by_group.setdefault(record['group_name'], {})[record['date']] = record
+            by_date.setdefault(record['date'], []).append(record)
+            group_ids.setdefault(
+                record['group_name'], (record['display_order'], record['group_id'])
+            )
+
+        return cls(
+            start_date=start_date,
+            built_at=datetime.now(),
+            by_group=MappingProxyType({
+                group_name: MappingProxyType(days)
+                for group_name, days in by_group.items()
+            }),
+            by_date=MappingProxyType({
+                day: tuple(rows) for day, rows in by_date.items()
+            }),
+            groups=tuple(
+                MappingProxyType({'group_name': group_name, 'group_id': group_id})
+                for group_name, (_, group_id) in sorted(group_ids.items(), key=lambda item: item[1])
+            ),
+            dates=tuple(sorted(by_date))
+        )
+
+    def covers(self, day: date) -> bool:
+        """
+        Проверяет, попадает ли дата в горизонт снимка.
+        """
+        return day >= self.start_date
+
+    def get(self, group_name: str, day: date) -> Optional[asyncpg.Record]:
+        return self.by_group.get(group_name, {}).get(day)
+
+    def get_alert(self, day: date) -> Optional[str]:
+        for record in self.by_date.get(day, ()):
+            if record['alert']:
+                return record['alert']
+        return None
@@ -0,0 +1,49 @@
+import logging
+from typing import Optional
+from uuid import uuid4
+
+import asyncpg
+from asyncpg import Pool
+
+
+logger = logging.getLogger(__name__)
+
+# Идентификатор процесса в оповещениях: свои оповещения процесс пропускает
+NOTIFY_SENDER = uuid4().hex
+
+# Каналы NOTIFY между процессами
+SCHEDULE_CHANNEL = 'schedule_updated'
+PARSER_MODE_CHANNEL = 'parser_mode'
+
+
+class SettingsManager:
+    def __init__(self, pool: Pool):
+        self.pool = pool
+
+    async def get_setting(self, key: str) -> Optional[str]:
+        """
+        Возвращает значение общей для всех процессов настройки.
+        """
+        return await self.pool.fetchval("SELECT value FROM bot_settings WHERE key = $1;", key)
+
+    async def set_setting(self, key: str, value: Optional[str]) -> None:
+        """
+        Сохраняет общую для всех процессов настройку.
+        """
+        query = """
+        INSERT INTO bot_settings (key, value)
+        VALUES ($1, $2)
+        ON CONFLICT (key)
+        DO UPDATE SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP;
+        """
+        await self.pool.execute(query, key, value)
+
+    async def notify(self, channel: str) -> None:
+        """
+        Оповещает остальные процессы через NOTIFY.
+        Ошибка не прерывает вызывающего: процессы догонят данные при переподключении.
+        """
+        try:
+            await self.pool.execute("SELECT pg_notify($1, $2);", channel, NOTIFY_SENDER)
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            logger.warning("Не удалось отправить оповещение %s: %s", channel, e)
@@ -0,0 +1,74 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from asyncpg import Pool
+
+
+logger = logging.getLogger(__name__)
+
+
+class UsageManager:
+    def __init__(self, pool: Pool):
+        self.pool = pool
+
+    async def write_usage(self, counters: List[tuple], last_seen: Dict[int, datetime]) -> None:
+        """
+        Записывает накопленные счётчики и время активности пользователей через COPY.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                if counters:
+                    await conn.copy_records_to_table(
+                        'usage_counters', records=counters,
+                        columns=['minute', 'group_name', 'date', 'action', 'count']
+                    )
+                if last_seen:
+                    await conn.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS user_activity_stage
+                    (LIKE user_activity) ON COMMIT DELETE ROWS;
+                    """)
+                    await conn.copy_records_to_table(
+                        'user_activity_stage', records=list(last_seen.items()),
+                        columns=['user_id', 'last_seen']
+                    )
+                    await conn.execute("""
+                    INSERT INTO user_activity (user_id, last_seen)
+                    SELECT user_id, last_seen FROM user_activity_stage
+                    ON CONFLICT (user_id)
+                    DO UPDATE SET last_seen = GREATEST(user_activity.last_seen, EXCLUDED.last_seen);
+                    """)
+        logger.debug("Записано счётчиков: %s, пользователей: %s.", len(counters), len(last_seen))
+
+    async def get_usage_summary(self, days: int = 7, limit: int = 5) -> Dict[str, Any]:
+        """
+        Сводка использования за days дней: популярные группы, часы пик и активные пользователи.
+        """
+        since = "CURRENT_TIMESTAMP - make_interval(days => $1)"
+        top_groups = await self.pool.fetch(f"""
+        SELECT group_name, SUM(count) AS requests
+        FROM usage_counters
+        WHERE minute >= {since} AND group_name IS NOT NULL
+        GROUP BY group_name
+        ORDER BY requests DESC
+        LIMIT $2;
+        """, days, limit)
+        peak_hours = await self.pool.fetch(f"""
+        SELECT EXTRACT(HOUR FROM minute)::INT AS hour, SUM(count) AS requests
+        FROM usage_counters
+        WHERE minute >= {since}
+        GROUP BY hour
+        ORDER BY requests DESC
+        LIMIT $2;
+        """, days, limit)
+        active = await self.pool.fetchrow("""
+        SELECT COUNT(*) FILTER (WHERE last_seen >= CURRENT_TIMESTAMP - INTERVAL '1 day') AS day,
+               COUNT(*) FILTER (WHERE last_seen >= CURRENT_TIMESTAMP - make_interval(days => $1)) AS period
+        FROM user_activity;
+        """, days)
+        return {
+            'top_groups': top_groups,
+            'peak_hours': peak_hours,
+            'active_day': active['day'],
+            'active_period': active['period']
+        }
@@ -1,11 +1,16 @@
 import logging
 
+from datetime import time
 from decimal import Decimal
 
-from asyncpg import Pool
-from async_lru import alru_cache
+from asyncpg import Pool, Record
 
-from typing import Optional, List
+from utils.db.cache import ttl_cache
+
+from typing import Any, Dict, List, Mapping, Optional
+
+
+logger = logging.getLogger(__name__)
 
 
 class UserService:
@@ -16,24 +21,32 @@ class UserService:
         """
         Добавляет нового пользователя в базу данных, если он ещё не существует.
         """
-        exists = await self.user_exists(user_id)
-        if not exists:
-            query = """
-            INSERT INTO users (user_id, username, group_name)
-            VALUES ($1, $2, $3);
-            """
-            await self.pool.execute(query, user_id, username, group_name)
-            logging.info(f"Пользователь {user_id} добавлен.")
+        query = """
+        INSERT INTO users (user_id, username, group_name)
+        VALUES ($1, $2, $3)
+        ON CONFLICT (user_id) DO NOTHING;
+        """
+        result = await self.pool.execute(query, user_id, username, group_name)
+        if result == "INSERT 0 1":
+            logger.info("Пользователь %s добавлен.", user_id)
             await self.clear_cache(user_id)
         else:
-            logging.info(f"Пользователь {user_id} уже существует.")
+            logger.info("Пользователь %s уже существует.", user_id)
 
-    @alru_cache(maxsize=128)
+    @ttl_cache(ttl=3600, maxsize=1024)
     async def user_exists(self, user_id: int) -> bool:
         """
         Проверяет существование пользователя в базе данных.
         """
-        return await self.pool.fetchval('SELECT 1 FROM users WHERE user_id=$1', user_id) is not None
+        query = 'SELECT 1 FROM users WHERE user_id=$1'
+        return await self.read.fetchval(query, user_id, key=('user', user_id)) is not None
+
+    async def get_role(self, user_id: int) -> Optional[str]:
+        """
+        Возвращает роль пользователя без кэша и с primary:
+        роли меняются вне бота, проверка прав должна видеть их сразу.
+        """
+        return await self.pool.fetchval("SELECT role FROM users WHERE user_id = $1;", user_id)
 
     async def update_role(self, user_id: int, new_role: str) -> bool:
         """
@@ -44,15 +57,15 @@ class UserService:
             result = await self.pool.execute(query, new_role, user_id)
 
             if result == "UPDATE 1":
-                logging.info(f"[{user_id}] Роль обновлена на '{new_role}'")
+                logger.info("[%s] Роль обновлена на '%s'", user_id, new_role)
                 await self.clear_cache(user_id)
                 return True
             else:
-                logging.warning(f"[{user_id}] Не удалось обновить роль: пользователь не найден")
+                logger.warning("[%s] Не удалось обновить роль: пользователь не найден", user_id)
                 return False
 
         except Exception as e:
-            logging.error(f"[{user_id}] Ошибка при обновлении роли: {e}")
+            logger.error("[%s] Ошибка при обновлении роли: %s", user_id, e)
             return False
 
     async def update_group(self, user_id: int, group: str) -> None:
@@ -60,7 +73,7 @@ class UserService:
         Обновляет группу пользователя в базе данных.
         """
         await self.pool.execute('UPDATE users SET group_name=$1 WHERE user_id=$2', group, user_id)
-        logging.info(f"Изменена группа пользователя {user_id} на {group}.")
+        logger.info("Изменена группа пользователя %s на %s.", user_id, group)
         await self.clear_cache(user_id)
 
     async def update_nick(self, user_id: int, username: str) -> str:
@@ -69,35 +82,80 @@ class UserService:
         """
         existing_nick = await self.pool.fetchval("SELECT 1 FROM users WHERE username=$1", username)
         if existing_nick:
-            logging.warning(f"Ник {username} уже занят.")
+            logger.warning("Ник %s уже занят.", username)
             return False
 
         await self.pool.execute('UPDATE users SET username=$1 WHERE user_id=$2', username, user_id)
-        logging.info(f"Пользователь {user_id} изменил ник на {username}.")
+        logger.info("Пользователь %s изменил ник на %s.", user_id, username)
         await self.clear_cache(user_id)
         return True
 
-    @alru_cache(maxsize=128)
+    async def update_digest_time(self, user_id: int, digest_time: Optional[time]) -> None:
+        """
+        Включает ежедневную рассылку расписания в указанное время (None — выключает).
+        """
+        await self.pool.execute('UPDATE users SET digest_time=$1 WHERE user_id=$2', digest_time, user_id)
+        logger.info("Пользователь %s изменил время рассылки на %s.", user_id, digest_time)
+        await self.clear_cache(user_id)
+
+    async def get_digest_subscribers(self, digest_time: time) -> Dict[str, List[int]]:
+        """
+        Возвращает подписчиков рассылки на указанное время, сгруппированных по группам.
+        """
+        query = """
+        SELECT group_name, array_agg(user_id) AS user_ids
+        FROM users
+        WHERE digest_time = $1 AND group_name IS NOT NULL
+        GROUP BY group_name;
+        """
+        records = await self.pool.fetch(query, digest_time)
+        return {record['group_name']: record['user_ids'] for record in records}
+
+    @ttl_cache(ttl=3600, maxsize=1024)
     async def get_group(self, user_id: int) -> str:
         """
         Получает название группы пользователя.
         """
-        logging.info("Получение названия группы пользователя.")
-        return await self.pool.fetchval("SELECT group_name FROM users WHERE user_id=$1;", user_id)
+        logger.debug("Получение названия группы пользователя %s.", user_id)
+        query = "SELECT group_name FROM users WHERE user_id=$1;"
+        return await self.read.fetchval(query, user_id, key=('user', user_id))
 
-    @alru_cache(maxsize=128)
+    @ttl_cache(ttl=3600, maxsize=1024)
     async def get_user_info(self, user_id: int) -> dict:
         """
         Получает информацию о пользователе.
         """
         query = "SELECT * FROM users WHERE user_id = $1;"
-        return await self.pool.fetchrow(query, user_id)
+        return await self.read.fetchrow(query, user_id, key=('user', user_id))
+
+    async def get_users(self, user_ids: List[int]) -> Dict[int, Optional[Record]]:
+        """
+        Получает пользователей одним запросом и заполняет их кэши.
+        """
+        query = "SELECT * FROM users WHERE user_id = ANY($1::bigint[]);"
+        records = await self.read.fetch(query, user_ids, keys=[('user', user_id) for user_id in user_ids])
+        records = {record['user_id']: record for record in records}
+        users = {user_id: records.get(user_id) for user_id in user_ids}
+        for user_id, record in users.items():
+            self.cache_user(user_id, record)
+        return users
+
+    def cache_user(self, user_id: int, record: Optional[Mapping[str, Any]]) -> None:
+        """
+        Заполняет кэши пользователя строкой, полученной в обход методов.
+        """
+        self.get_user_info.cache_put(record, user_id)
+        self.get_group.cache_put(record['group_name'] if record else None, user_id)
+        self.user_exists.cache_put(record is not None, user_id)
 
     async def clear_cache(self, user_id: int) -> None:
         """
         Очистка кэша для конкретного пользователя.
+        Вызывается после каждой записи, поэтому чтения пользователя
+        на время отставания реплики переводятся на primary.
         """
+        self.read.mark_written(('user', user_id))
         self.get_user_info.cache_invalidate(user_id)
         self.get_group.cache_invalidate(user_id)
         self.user_exists.cache_invalidate(user_id)
-        logging.info(f"Кэш для пользователя {user_id} очищен.")
+        logger.info("Кэш для пользователя %s очищен.", user_id)
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from datetime import date, time, timedelta
+from typing import Dict, List
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from utils.bot_session import bulk_priority
+from utils.db.main import Database
+from utils.formatting import format_schedule
+
+
+logger = logging.getLogger(__name__)
+
+# Время, на которое можно подписаться; подписчики хранятся по этим корзинам
+DIGEST_TIMES = (time(17), time(18), time(19), time(20), time(21))
+
+# Сколько сообщений отправляется одновременно; темп задаёт сессия бота
+SEND_CONCURRENCY = 20
+
+
+def next_day(today: date) -> date:
+    """
+    День, на который отправляется расписание: завтра, воскресенье пропускается.
+    """
+    day = today + timedelta(days=1)
+    if day.weekday() == 6:
+        day += timedelta(days=1)
+    return day
+
+
+class DigestSender:
+    """
+    Ежедневная рассылка расписания на следующий день.
+    На корзину: один запрос подписчиков, одно чтение расписания всех их групп
+    и одна отрисовка на группу — стоимость растёт с числом групп, а не пользователей.
+    """
+    def __init__(self, bot: Bot, db: Database) -> None:
+        self.bot = bot
+        self.db = db
+
+    def schedule(self, scheduler: AsyncIOScheduler) -> None:
+        for digest_time in DIGEST_TIMES:
+            scheduler.add_job(
+                self.send_bucket,
+                CronTrigger(hour=digest_time.hour, minute=digest_time.minute),
+                args=[digest_time],
+                id=f'digest_{digest_time:%H%M}',
+                misfire_grace_time=600
+            )
+
+    async def _send(self, user_id: int, text: str, stats: Dict[str, int]) -> None:
+        try:
+            await self.bot.send_message(user_id, text)
+            stats['sent'] += 1
+        except TelegramForbiddenError:
+            # Пользователь заблокировал бота — отписываем
+            stats['blocked'] += 1
+            await self.db.update_digest_time(user_id, None)
+        except TelegramAPIError as e:
+            stats['errors'] += 1
+            logger.warning("Не удалось отправить рассылку пользователю %s: %s", user_id, e)
+
+    async def send_bucket(self, digest_time: time) -> Dict[str, int]:
+        day = next_day(date.today())
+        subscribers = await self.db.get_digest_subscribers(digest_time)
+        stats = {'groups': len(subscribers), 'sent': 0, 'blocked': 0, 'errors': 0, 'no_schedule': 0}
+        if not subscribers:
+            return stats
+
+        snapshot = self.db.snapshot
+        if snapshot is not None and snapshot.covers(day):
+            schedules = {(group_name, day): snapshot.get(group_name, day) for group_name in subscribers}
+        else:
+            schedules = await self.db.get_schedules([(group_name, day) for group_name in subscribers])
+        messages: List[tuple[int, str]] = []
+        for group_name, user_ids in subscribers.items():
+            schedule_data = schedules.get((group_name, day))
+            if schedule_data is None:
+                stats['no_schedule'] += len(user_ids)
+                continue
+            text = format_schedule(schedule_data)
+            messages.extend((user_id, text) for user_id in user_ids)
+
+        semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+
+        async def send(user_id: int, text: str) -> None:
+            async with semaphore:
+                await self._send(user_id, text, stats)
+
+        with bulk_priority():
+            await asyncio.gather(*(send(user_id, text) for user_id, text in messages))
+
+        logger.info("Рассылка на %s (%s): %s", day, format(digest_time, '%H:%M'), stats)
+        return stats
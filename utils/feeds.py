@@ -0,0 +1,236 @@
+import gzip
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from os import getenv
+from typing import Any, Dict, List, Mapping, Optional
+from zoneinfo import ZoneInfo
+
+from aiohttp import web
+
+from utils.db.main import Database
+from utils.formatting import schedule_pairs
+
+
+logger = logging.getLogger(__name__)
+
+# Длительность пары и перемены, мин: конец занятий в ленте считается по числу пар
+PAIR_MINUTES = 90
+BREAK_MINUTES = 10
+
+
+@dataclass(frozen=True)
+class Feed:
+    """
+    Готовая лента: тело, сжатое тело и ETag.
+    """
+    content_type: str
+    body: bytes
+    body_gzip: bytes
+    etag: str
+
+    @classmethod
+    def build(cls, content_type: str, body: bytes) -> 'Feed':
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        return cls(content_type, body, gzip.compress(body, compresslevel=9), etag)
+
+
+def _ics_escape(text: Any) -> str:
+    return str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _ics_fold(line: str) -> List[str]:
+    # RFC 5545: строки длиннее 75 октетов переносятся с пробелом в начале
+    parts, current = [], ''
+    for char in line:
+        if len((current + char).encode()) > 75:
+            parts.append(current)
+            current = ' '
+        current += char
+    return parts + [current]
+
+
+def _pairs_span(pairs: List[Mapping[str, Any]]) -> int:
+    """
+    Число пар от первой до последней (с окнами между ними).
+    """
+    numbers = [int(pair['subject_number']) for pair in pairs if str(pair.get('subject_number')).isdigit()]
+    if numbers:
+        return max(numbers) - min(numbers) + 1
+    return max(len(pairs), 1)
+
+
+def _ics_time(day: date, start_at: Any, pairs: List[Mapping[str, Any]], tz: ZoneInfo) -> List[str]:
+    """
+    DTSTART и DTEND события дня в UTC; без времени начала — событие на весь день.
+    """
+    try:
+        hour, minute = map(int, str(start_at).split(':'))
+        start = datetime.combine(day, time(hour, minute), tzinfo=tz)
+    except ValueError:
+        return [f'DTSTART;VALUE=DATE:{day:%Y%m%d}', f'DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}']
+
+    span = _pairs_span(pairs)
+    end = start + timedelta(minutes=span * PAIR_MINUTES + (span - 1) * BREAK_MINUTES)
+    return [
+        f'DTSTART:{start.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}',
+        f'DTEND:{end.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}'
+    ]
+
+
+def render_ics(group_name: str, group_id: int, days: List[Mapping[str, Any]]) -> bytes:
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    tz_name = getenv('SCHEDULE_TZ', 'Europe/Moscow')
+    tz = ZoneInfo(tz_name)
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//aiogram_pmk_bot//schedule//RU',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_ics_escape(group_name)}',
+        f'X-WR-TIMEZONE:{tz_name}'
+    ]
+    for schedule_data in days:
+        day = schedule_data['date']
+        pairs = schedule_pairs(schedule_data)
+        description = '\n'.join(
+            f"{pair['subject_number']}. {pair['subject_name']} - {pair['room_number']} ({pair['teacher']})"
+            for pair in pairs
+        )
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:{group_id}-{day:%Y%m%d}@aiogram_pmk_bot',
+            f'DTSTAMP:{stamp}',
+            *_ics_time(day, schedule_data['start_at'], pairs, tz),
+            f'SUMMARY:{_ics_escape(f"Пары {group_name}: {len(pairs)}")}',
+            f'DESCRIPTION:{_ics_escape(description)}',
+            'END:VEVENT'
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(part for line in lines for part in _ics_fold(line)).encode() + b'\r\n'
+
+
+def render_json(group_name: str, group_id: int, days: List[Mapping[str, Any]]) -> bytes:
+    data = {
+        'group': group_name,
+        'group_id': group_id,
+        'days': [
+            {
+                'date': schedule_data['date'].isoformat(),
+                'weekday': schedule_data['weekday'],
+                'start_at': schedule_data['start_at'],
+                'alert': schedule_data['alert'],
+                'subjects': schedule_pairs(schedule_data)
+            }
+            for schedule_data in days
+        ]
+    }
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+class FeedStore:
+    """
+    Ленты расписания групп в формате iCalendar и JSON.
+    Строятся при смене версии данных для каждой группы из get_groups_name
+    (у группы без занятий в снимке лента пустая); лента группы пересобирается,
+    только если изменились её дни (иначе ETag не меняется).
+    """
+    RENDERERS = {
+        'ics': ('text/calendar; charset=utf-8', render_ics),
+        'json': ('application/json; charset=utf-8', render_json)
+    }
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self.version: Optional[int] = None
+        self._feeds: Dict[tuple[int, str], Feed] = {}
+        self._hashes: Dict[int, str] = {}
+
+    async def refresh(self) -> None:
+        snapshot = self.db.snapshot
+        version = self.db.data_version
+        if snapshot is None or self.version == version:
+            return
+
+        groups = await self.db.get_groups_name()
+        rebuilt = 0
+        for group in groups:
+            group_name, group_id = group['group_name'], group['group_id']
+            days_map = snapshot.by_group.get(group_name, {})
+            days = [days_map[day] for day in sorted(days_map)]
+
+            digest = hashlib.sha1(repr([tuple(record.items()) for record in days]).encode()).hexdigest()
+            if self._hashes.get(group_id) == digest:
+                continue
+
+            for kind, (content_type, render) in self.RENDERERS.items():
+                self._feeds[(group_id, kind)] = Feed.build(content_type, render(group_name, group_id, days))
+            self._hashes[group_id] = digest
+            rebuilt += 1
+
+        # Ленты групп, которых больше нет в списке, не отдаём
+        group_ids = {group['group_id'] for group in groups}
+        for group_id in self._hashes.keys() - group_ids:
+            del self._hashes[group_id]
+            for kind in self.RENDERERS:
+                self._feeds.pop((group_id, kind), None)
+
+        self.version = version
+        logger.info("Ленты расписания обновлены, пересобрано групп: %s.", rebuilt)
+
+    async def get(self, group_id: int, kind: str) -> Optional[Feed]:
+        await self.refresh()
+        return self._feeds.get((group_id, kind))
+
+
+async def serve_feed(request: web.Request) -> web.Response:
+    store: FeedStore = request.app['feeds']
+    feed = await store.get(int(request.match_info['group_id']), request.match_info['kind'])
+    if feed is None:
+        raise web.HTTPNotFound()
+
+    headers = {'Cache-Control': 'public, max-age=900', 'Vary': 'Accept-Encoding'}
+    body, etag = feed.body, feed.etag
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        # У сжатого представления свой ETag
+        body, etag = feed.body_gzip, feed.etag[:-1] + '-gz"'
+        headers['Content-Encoding'] = 'gzip'
+    headers['ETag'] = etag
+
+    if etag in request.headers.get('If-None-Match', ''):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, headers={**headers, 'Content-Type': feed.content_type})
+
+
+def create_feed_app(db: Database) -> web.Application:
+    app = web.Application()
+    app['feeds'] = FeedStore(db)
+    app.router.add_get(r'/feeds/{group_id:\d+}.{kind:ics|json}', serve_feed)
+    return app
+
+
+async def start_feed_server(db: Database) -> Optional[web.AppRunner]:
+    """
+    Запускает HTTP-сервер лент, если задан FEEDS_PORT.
+    """
+    port = getenv('FEEDS_PORT')
+    if not port:
+        return None
+
+    runner = web.AppRunner(create_feed_app(db))
+    await runner.setup()
+    # reuse_port: в режиме нескольких процессов порт слушает каждый из них
+    site = web.TCPSite(runner, getenv('FEEDS_HOST', '0.0.0.0'), int(port), reuse_port=True)
+    await site.start()
+    logger.info("Сервер лент расписания запущен на порту %s.", port)
+    return runner
+
+
+def feed_url(group_id: int, kind: str = 'ics') -> Optional[str]:
+    """
+    Публичная ссылка на ленту группы, если задан FEEDS_URL.
+    """
+    base = getenv('FEEDS_URL')
+    return f"{base.rstrip('/')}/feeds/{group_id}.{kind}" if base else None
@@ -0,0 +1,65 @@
+import json
+from typing import Any, Dict, List, Mapping, Sequence
+
+# Ограничение Telegram на длину текста сообщения
+MESSAGE_LIMIT = 4096
+
+WEEKDAYS = ('Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс')
+
+
+def schedule_pairs(schedule_data: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Возвращает пары из поля subjects (JSONB приходит из asyncpg строкой).
+    """
+    subjects = schedule_data['subjects']
+    return json.loads(subjects) if isinstance(subjects, str) else list(subjects or [])
+
+
+def format_pairs(pairs: List[Mapping[str, Any]]) -> str:
+    pair_data = ''
+    for pair in pairs:
+        pair_data += f"{pair['subject_number']}. {pair['subject_name']} - {pair['room_number']}\n" \
+                     f"Преподаватель: {pair['teacher']}\n\n"
+    return pair_data
+
+
+def format_schedule(schedule_data: Mapping[str, Any]) -> str:
+    """
+    Текст расписания группы на один день.
+    """
+    return f'Расписание на {schedule_data["date"]} ({schedule_data["weekday"]}).\n\n' \
+           f'Группа - {schedule_data["group_name"]}\n' \
+           f'Начало в {schedule_data["start_at"]}\n\n' \
+           f'{format_pairs(schedule_pairs(schedule_data))}'
+
+
+def _format_day(schedule_data: Mapping[str, Any], teachers: bool) -> str:
+    day = schedule_data['date']
+    lines = [f"{WEEKDAYS[day.weekday()]} {day:%d.%m}, начало в {schedule_data['start_at']}"]
+    for pair in schedule_pairs(schedule_data):
+        line = f"{pair['subject_number']}. {pair['subject_name']} - {pair['room_number']}"
+        if teachers and pair.get('teacher'):
+            line += f" ({pair['teacher']})"
+        lines.append(line)
+    return '\n'.join(lines) + '\n\n'
+
+
+def format_week(group_name: str, schedules: Sequence[Mapping[str, Any]]) -> str:
+    """
+    Компактное расписание группы на несколько дней в одном сообщении.
+    Если текст не помещается в лимит Telegram, сначала убираются
+    преподаватели, затем дни, которые не влезли.
+    """
+    header = f'Расписание группы {group_name} на неделю.\n\n'
+    for teachers in (True, False):
+        days = [_format_day(schedule_data, teachers) for schedule_data in schedules]
+        text = header + ''.join(days)
+        if len(text) <= MESSAGE_LIMIT:
+            return text
+
+    text, tail = header, '...'
+    for day in days:
+        if len(text) + len(day) + len(tail) > MESSAGE_LIMIT:
+            return text + tail
+        text += day
+    return text
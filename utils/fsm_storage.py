@@ -0,0 +1,76 @@
+import json
+import logging
+from os import getenv
+from typing import Any, Dict, Optional
+
+from asyncpg import Pool
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresStorage(BaseStorage):
+    """
+    Хранилище FSM в Postgres, общее для всех процессов бота.
+    """
+    def __init__(self, pool: Pool, key_builder: Optional[KeyBuilder] = None) -> None:
+        self.pool = pool
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        query = """
+        INSERT INTO fsm_storage (key, state)
+        VALUES ($1, $2)
+        ON CONFLICT (key)
+        DO UPDATE SET state = EXCLUDED.state, updated_at = CURRENT_TIMESTAMP;
+        """
+        await self.pool.execute(query, self.key_builder.build(key), value)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self.pool.fetchval(
+            "SELECT state FROM fsm_storage WHERE key = $1;", self.key_builder.build(key)
+        )
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        query = """
+        INSERT INTO fsm_storage (key, data)
+        VALUES ($1, $2)
+        ON CONFLICT (key)
+        DO UPDATE SET data = EXCLUDED.data, updated_at = CURRENT_TIMESTAMP;
+        """
+        await self.pool.execute(query, self.key_builder.build(key), json.dumps(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        data = await self.pool.fetchval(
+            "SELECT data FROM fsm_storage WHERE key = $1;", self.key_builder.build(key)
+        )
+        return json.loads(data) if data else {}
+
+    async def close(self) -> None:
+        # Пулом соединений владеет Database
+        pass
+
+
+def create_fsm_storage(pool: Pool, default: str = 'memory') -> BaseStorage:
+    """
+    Создаёт хранилище FSM по переменной окружения FSM_STORAGE
+    (memory, postgres или redis с адресом в REDIS_URL).
+    """
+    kind = getenv('FSM_STORAGE', default)
+
+    if kind == 'redis':
+        # Требует пакет redis
+        from aiogram.fsm.storage.redis import RedisStorage
+        storage = RedisStorage.from_url(getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    elif kind == 'postgres':
+        storage = PostgresStorage(pool)
+    else:
+        storage = MemoryStorage()
+
+    logger.info("Хранилище FSM: %s.", kind)
+    return storage
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import random
+import time
+from os import getenv
+from typing import Optional
+
+import aiohttp
+from fake_useragent import UserAgent
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """
+    Запрос не выполнен: сайт недавно многократно не отвечал.
+    """
+
+
+class CircuitBreaker:
+    """
+    После failure_threshold ошибок подряд запросы блокируются на reset_timeout
+    секунд, затем пропускается один пробный запрос.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 120) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_request(self) -> bool:
+        """
+        Пропускает запрос или бросает CircuitOpenError.
+        Возвращает True, если запрос пробный.
+        """
+        state = self.state
+        if state == 'open' or (state == 'half-open' and self._probe):
+            raise CircuitOpenError('Сайт расписания временно недоступен.')
+        if state == 'half-open':
+            self._probe = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probe = False
+
+    def release_probe(self) -> None:
+        """
+        Освобождает пробный запрос, завершившийся без результата
+        (отмена, ошибка разбора ответа): следующий запрос станет пробным.
+        """
+        self._probe = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            logger.warning("Circuit breaker открыт после %s ошибок подряд.", self.failures)
+
+
+class ScraperClient:
+    """
+    Долгоживущий HTTP-клиент парсера: пул keep-alive соединений с лимитом
+    на хост, таймауты, повторы с экспоненциальной задержкой и circuit breaker.
+    """
+    RETRY_STATUSES = {500, 502, 503, 504, 520, 521, 522, 524}
+
+    def __init__(self) -> None:
+        self.retries = int(getenv('SCRAPER_RETRIES', 3))
+        self.backoff = float(getenv('SCRAPER_BACKOFF', 1))
+        self.timeout = aiohttp.ClientTimeout(
+            total=float(getenv('SCRAPER_TIMEOUT', 30)),
+            sock_connect=10,
+            sock_read=float(getenv('SCRAPER_READ_TIMEOUT', 10))
+        )
+        self.limit_per_host = int(getenv('SCRAPER_LIMIT_PER_HOST', 4))
+        self.breaker = CircuitBreaker()
+        self.ua = UserAgent()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit_per_host * 2,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=60,
+                    ttl_dns_cache=300
+                )
+            )
+        return self._session
+
+    def _delay(self, attempt: int) -> float:
+        # Экспоненциальная задержка с полным случайным разбросом
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    async def get_text(self, url: str) -> str:
+        """
+        Загружает страницу, повторяя запрос при 5xx и таймаутах.
+        """
+        for attempt in range(self.retries + 1):
+            probe = self.breaker.before_request()
+            try:
+                async with self.session.get(url, headers={'User-Agent': self.ua.random}) as response:
+                    if response.status in self.RETRY_STATUSES:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info, response.history,
+                            status=response.status, message=response.reason
+                        )
+                    # Сайт ответил: для circuit breaker это успех, даже при 4xx
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                    text = await response.text()
+            except (aiohttp.ClientResponseError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status in self.RETRY_STATUSES
+                if retryable:
+                    self.breaker.record_failure()
+                if not retryable or attempt == self.retries:
+                    raise
+                delay = self._delay(attempt)
+                logger.warning("Ошибка запроса %s (%r), повтор через %.1f с.", url, e, delay)
+                await asyncio.sleep(delay)
+            else:
+                return text
+            finally:
+                if probe:
+                    self.breaker.release_probe()
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+_client: Optional[ScraperClient] = None
+
+
+def get_scraper_client() -> ScraperClient:
+    """
+    Возвращает общий для всех запусков парсера клиент.
+    """
+    global _client
+    if _client is None:
+        _client = ScraperClient()
+    return _client
+
+
+async def close_scraper_client() -> None:
+    if _client is not None:
+        await _client.close()
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from utils.db.main import Database
+from utils.parser import Parser
+
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock: парсер одновременно работает только в одном процессе
+INGEST_LOCK_ID = 7_240_002
+
+
+@dataclass(frozen=True)
+class IngestResult:
+    trigger: str
+    started_at: datetime
+    status: str
+    duration: float = 0.0
+    records: int = 0
+    changed: bool = False
+    digest: Optional[str] = None
+    date_digests: Optional[Dict[str, str]] = None
+    error: Optional[str] = None
+
+    def describe(self) -> str:
+        statuses = {'ok': 'успешно', 'error': 'ошибка', 'busy': 'занято другим процессом'}
+        text = (
+            f'{self.started_at:%d.%m %H:%M} ({self.trigger}): {statuses.get(self.status, self.status)}, '
+            f'{self.duration:.1f} с, записей {self.records}'
+        )
+        if self.changed:
+            text += ', есть изменения'
+        if self.error:
+            text += f'\n{self.error}'
+        return text
+
+
+def dates_changed(previous: Dict[str, str], current: Dict[str, str]) -> bool:
+    """
+    Есть ли изменения в датах, полученных в обоих запусках.
+    Новые даты горизонта (например, после полуночи) и даты, которые не удалось
+    загрузить, изменением не считаются.
+    """
+    return any(previous[day] != digest for day, digest in current.items() if day in previous)
+
+
+class IngestCoordinator:
+    """
+    Запускает обновление расписания не более одного раза одновременно.
+    Повторные запросы во время работы получают результат текущего запуска.
+    Между процессами запуск защищён advisory lock в Postgres.
+    """
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self.last_result: Optional[IngestResult] = None
+        self._current: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        try:
+            last_run = await self.db.get_last_parser_run()
+            if last_run:
+                self.last_result = IngestResult(
+                    trigger=last_run['trigger'] or 'scheduler',
+                    started_at=last_run['started_at'],
+                    status=last_run['status'],
+                    duration=last_run['duration'] or 0.0,
+                    records=last_run['records'] or 0,
+                    changed=last_run['changed'],
+                    digest=last_run['digest'],
+                    error=last_run['error']
+                )
+        except Exception as e:
+            logger.error("Не удалось получить последний запуск парсера: %s", e)
+
+    @property
+    def running(self) -> bool:
+        return self._current is not None and not self._current.done()
+
+    async def run(self, trigger: str) -> IngestResult:
+        """
+        Запускает обновление или присоединяется к уже идущему.
+        """
+        if not self.running:
+            self._current = asyncio.create_task(self._run(trigger))
+        else:
+            logger.info("Обновление уже выполняется, запрос '%s' ожидает его результат.", trigger)
+        return await asyncio.shield(self._current)
+
+    async def _run(self, trigger: str) -> IngestResult:
+        started_at = datetime.now()
+        started = time.monotonic()
+
+        async with self.db.pool.acquire() as conn:
+            if not await conn.fetchval("SELECT pg_try_advisory_lock($1);", INGEST_LOCK_ID):
+                logger.info("Обновление расписания уже выполняется другим процессом.")
+                self.last_result = IngestResult(trigger, started_at, 'busy')
+                return self.last_result
+            try:
+                result = await self._ingest(trigger, started_at, started)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1);", INGEST_LOCK_ID)
+
+        try:
+            await self.db.add_parser_run(result)
+        except Exception as e:
+            logger.error("Не удалось записать результат запуска парсера: %s", e)
+
+        self.last_result = result
+        return result
+
+    async def _ingest(self, trigger: str, started_at: datetime, started: float) -> IngestResult:
+        logger.info("Запуск парсера (%s)...", trigger)
+        try:
+            # Читается под блокировкой: последний запуск мог быть в другом процессе
+            previous = await self.db.get_last_parser_digests()
+            parser = Parser()
+            await parser.stream_db_data(self.db)
+            digest = parser.get_digest()
+            date_digests = parser.get_date_digests()
+            records = parser.records
+        except Exception as e:
+            logger.error("Ошибка в парсере: %s", e, exc_info=True)
+            return IngestResult(
+                trigger, started_at, 'error',
+                duration=time.monotonic() - started, error=str(e)
+            )
+
+        changed = dates_changed(previous, date_digests)
+        # Даты, не загруженные в этот раз, сравниваются со старым отпечатком в следующий
+        date_digests = {
+            day: value for day, value in {**previous, **date_digests}.items()
+            if day >= started_at.date().isoformat()
+        }
+        logger.info("Парсер успешно завершил работу.")
+        return IngestResult(
+            trigger, started_at, 'ok',
+            duration=time.monotonic() - started,
+            records=records, changed=changed, digest=digest, date_digests=date_digests
+        )
@@ -0,0 +1,128 @@
+import logging
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
+
+from utils.db.schedule_snapshot import ScheduleSnapshot
+from utils.formatting import MESSAGE_LIMIT, format_pairs, format_schedule, schedule_pairs
+
+
+logger = logging.getLogger(__name__)
+
+# Telegram принимает не больше 50 результатов на один ответ
+MAX_RESULTS = 50
+
+
+def normalize(text: str) -> str:
+    """
+    Приводит запрос к виду ключа: "ИС-21", "ис 21" и "ис21" совпадают.
+    """
+    return re.sub(r'[\s\-_.]+', '', text.lower().replace('ё', 'е'))
+
+
+class PrefixTrie:
+    """
+    Префиксное дерево: в каждом узле хранятся номера записей,
+    ключи которых начинаются с этого префикса (не больше limit).
+    """
+    def __init__(self, limit: int = MAX_RESULTS) -> None:
+        self.limit = limit
+        self.root: Dict[str, dict] = {}
+
+    def insert(self, key: str, item: int) -> None:
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+            items = node.setdefault('', [])
+            if len(items) < self.limit and item not in items:
+                items.append(item)
+
+    def search(self, prefix: str) -> List[int]:
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node.get('', [])
+
+
+class InlineIndex:
+    """
+    Индекс для inline-режима по группам и преподавателям из снимка расписания.
+    Статьи с расписанием на ближайший день рендерятся при построении,
+    поиск — только проход по дереву.
+    Индекс перестраивается при смене снимка или даты.
+    """
+    def __init__(self) -> None:
+        self.articles: List[InlineQueryResultArticle] = []
+        self.trie = PrefixTrie()
+        self._built_for: Optional[Tuple[int, date]] = None
+
+    def _day(self, snapshot: ScheduleSnapshot, today: date) -> Optional[date]:
+        return next((day for day in snapshot.dates if day >= today), None)
+
+    def build(self, snapshot: ScheduleSnapshot, day: date) -> None:
+        articles: List[InlineQueryResultArticle] = []
+        trie = PrefixTrie()
+        teachers: Dict[str, List[tuple]] = {}
+
+        for group in snapshot.groups:
+            schedule_data = snapshot.get(group['group_name'], day)
+            if schedule_data is None:
+                continue
+            pairs = schedule_pairs(schedule_data)
+            for pair in pairs:
+                if pair.get('teacher'):
+                    teachers.setdefault(pair['teacher'], []).append((group['group_name'], pair))
+
+            trie.insert(normalize(group['group_name']), len(articles))
+            articles.append(InlineQueryResultArticle(
+                id=f"g{group['group_id']}:{day:%Y%m%d}",
+                title=group['group_name'],
+                description=f"Расписание на {day:%d.%m}, пар: {len(pairs)}",
+                input_message_content=InputTextMessageContent(
+                    message_text=format_schedule(schedule_data)[:MESSAGE_LIMIT]
+                )
+            ))
+
+        for number, (teacher, lessons) in enumerate(sorted(teachers.items())):
+            lessons.sort(key=lambda lesson: str(lesson[1]['subject_number']))
+            text = f'Расписание на {day} для преподавателя {teacher}.\n\n' + ''.join(
+                f'Группа - {group_name}\n' + format_pairs([pair])
+                for group_name, pair in lessons
+            )
+            item = len(articles)
+            trie.insert(normalize(teacher), item)
+            # Поиск и по отдельным словам: фамилии, имени, инициалам
+            for word in teacher.split()[1:]:
+                trie.insert(normalize(word), item)
+            articles.append(InlineQueryResultArticle(
+                id=f"t{number}:{day:%Y%m%d}",
+                title=teacher,
+                description=f"Преподаватель, {day:%d.%m}, пар: {len(lessons)}",
+                input_message_content=InputTextMessageContent(message_text=text[:MESSAGE_LIMIT])
+            ))
+
+        self.articles, self.trie = articles, trie
+        logger.info("Inline-индекс построен на %s, статей: %s.", day, len(articles))
+
+    def search(self, query: str, snapshot: Optional[ScheduleSnapshot], version: int) -> List[InlineQueryResultArticle]:
+        """
+        Возвращает готовые статьи для запроса. Пустой запрос — первые группы.
+        """
+        if snapshot is None:
+            return []
+
+        day = self._day(snapshot, date.today())
+        if day is None:
+            return []
+        if self._built_for != (version, day):
+            self.build(snapshot, day)
+            self._built_for = (version, day)
+
+        key = normalize(query)
+        if not key:
+            return self.articles[:MAX_RESULTS]
+        return [self.articles[item] for item in self.trie.search(key)]
@@ -0,0 +1,154 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from datetime import datetime
+from os import getenv
+from typing import Any, Dict, Tuple
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Записывает каждое сообщение одной JSON-строкой.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+        }
+        if getattr(record, 'suppressed', 0):
+            data['suppressed'] = record.suppressed
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc_info'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Пропускает не больше rate сообщений с одним шаблоном за period секунд.
+    Ограничиваются только сообщения ниже WARNING; число отброшенных
+    добавляется к следующему пропущенному сообщению.
+    """
+    def __init__(self, rate: int = 20, period: float = 10) -> None:
+        super().__init__()
+        self.rate = rate
+        self.period = period
+        self._windows: Dict[Tuple[str, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        window = self._windows.setdefault(key, [now, 0, 0])
+
+        if now - window[0] >= self.period:
+            record.suppressed = window[2]
+            window[:] = [now, 1, 0]
+            return True
+
+        if window[1] < self.rate:
+            window[1] += 1
+            record.suppressed = 0
+            return True
+
+        window[2] += 1
+        return False
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Передаёт в очередь уже отформатированное сообщение, а трейсбек
+    отдельно в exc_text, чтобы JsonFormatter записал его своим полем.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(value: str) -> Dict[str, str]:
+    """
+    Разбирает строку вида "utils.db=WARNING,aiogram=INFO".
+    """
+    levels = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, level = item.partition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def _queue_handler(log_queue: Any) -> StructuredQueueHandler:
+    handler = StructuredQueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter(rate=int(getenv('LOG_RATE_LIMIT', 20))))
+    return handler
+
+
+def _setup_root(handler: logging.Handler) -> None:
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(getenv('LOG_LEVEL', 'INFO').upper())
+
+    for name, level in parse_levels(getenv('LOG_LEVELS', 'aiogram.event=WARNING')).items():
+        logging.getLogger(name).setLevel(level)
+
+
+def setup_logging(log_queue: Any = None) -> logging.handlers.QueueListener:
+    """
+    Настраивает логирование: запись в консоль и файл идёт в отдельном потоке
+    через QueueHandler/QueueListener, файл ротируется по размеру.
+    При нескольких процессах передаётся multiprocessing-очередь: процессы-обработчики
+    пишут в неё через setup_worker_logging(), а файл открыт только здесь.
+
+    Переменные окружения: LOG_LEVEL, LOG_LEVELS (уровни по модулям),
+    LOG_FORMAT (json или text), LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT,
+    LOG_RATE_LIMIT (сообщений одного вида за 10 секунд).
+    """
+    if getenv('LOG_FORMAT', 'json') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+    handlers = [
+        logging.StreamHandler(),
+        logging.handlers.RotatingFileHandler(
+            getenv('LOG_FILE', 'app.log'),
+            maxBytes=int(getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+            backupCount=int(getenv('LOG_BACKUP_COUNT', 5)),
+            encoding='utf-8'
+        )
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    if log_queue is None:
+        log_queue = queue.SimpleQueue()
+    _setup_root(_queue_handler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def setup_worker_logging(log_queue: Any) -> None:
+    """
+    Настраивает логирование процесса-обработчика: сообщения передаются
+    в очередь главного процесса, который один пишет в консоль и файл
+    (RotatingFileHandler небезопасен при записи из нескольких процессов).
+    """
+    _setup_root(_queue_handler(log_queue))
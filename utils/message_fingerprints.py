@@ -0,0 +1,150 @@
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import AnswerCallbackQuery, EditMessageReplyMarkup, EditMessageText, SendMessage, TelegramMethod
+from aiogram.types import InlineKeyboardMarkup, Message
+
+
+logger = logging.getLogger(__name__)
+
+
+def text_fingerprint(text: Optional[str]) -> int:
+    # Telegram обрезает пробелы и переводы строк по краям текста
+    return hash((text or '').strip())
+
+
+def markup_fingerprint(markup: Optional[InlineKeyboardMarkup]) -> int:
+    if markup is None:
+        return hash(None)
+    return hash(markup.model_dump_json(exclude_none=True))
+
+
+class MessageFingerprints:
+    """
+    Последнее отображённое содержимое сообщений бота: отпечатки текста
+    и клавиатуры по (chat_id, message_id) и ответы на callback'и.
+    Размер ограничен maxsize сообщений.
+    """
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.maxsize = maxsize
+        self._messages: OrderedDict[Hashable, tuple[int, int]] = OrderedDict()
+        self._answered: OrderedDict[str, None] = OrderedDict()
+        self.stats = {
+            'edits_skipped': 0, 'answers_skipped': 0,
+            'not_modified': 0, 'answers_lost': 0
+        }
+
+    @property
+    def saved(self) -> int:
+        """
+        Число сэкономленных запросов к Bot API.
+        """
+        return self.stats['edits_skipped'] + self.stats['answers_skipped']
+
+    def _put(self, storage: OrderedDict, key: Hashable, value: Any) -> None:
+        storage[key] = value
+        storage.move_to_end(key)
+        if len(storage) > self.maxsize:
+            storage.popitem(last=False)
+
+    def get(self, chat_id: Any, message_id: int) -> Optional[tuple[int, int]]:
+        return self._messages.get((chat_id, message_id))
+
+    def remember(self, chat_id: Any, message_id: int, text: int, markup: int) -> None:
+        self._put(self._messages, (chat_id, message_id), (text, markup))
+
+    def remember_message(self, message: Message) -> None:
+        """
+        Запоминает содержимое сообщения, пришедшего в апдейте или в ответе API.
+        """
+        if getattr(message, 'text', None) is not None:
+            self.remember(
+                message.chat.id, message.message_id,
+                text_fingerprint(message.text), markup_fingerprint(message.reply_markup)
+            )
+
+    def is_answered(self, callback_query_id: str) -> bool:
+        return callback_query_id in self._answered
+
+    def mark_answered(self, callback_query_id: str) -> None:
+        self._put(self._answered, callback_query_id, None)
+
+    def info(self) -> Dict[str, int]:
+        return {**self.stats, 'saved': self.saved, 'messages': len(self._messages)}
+
+
+class SkipRedundantEditsMiddleware(BaseRequestMiddleware):
+    """
+    Не отправляет правки, которые не меняют сообщение, и повторные
+    ответы на уже отвеченный callback. Вместо запроса возвращает True,
+    как Bot API для успешной правки. Повторный ответ с текстом Telegram
+    всё равно отклонил бы — такие ответы пишутся в лог и не считаются экономией.
+    """
+    def __init__(self, fingerprints: MessageFingerprints) -> None:
+        self.fingerprints = fingerprints
+
+    def _target(self, method: TelegramMethod) -> Optional[tuple[Any, int]]:
+        if method.inline_message_id or method.chat_id is None or method.message_id is None:
+            return None
+        return method.chat_id, method.message_id
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod
+    ) -> Any:
+        fingerprints = self.fingerprints
+
+        if isinstance(method, AnswerCallbackQuery):
+            if fingerprints.is_answered(method.callback_query_id):
+                if method.text or method.show_alert or method.url:
+                    # Telegram не примет второй ответ: текст до пользователя не дойдёт
+                    fingerprints.stats['answers_lost'] += 1
+                    logger.warning(
+                        "Ответ на callback %s с текстом %r пропущен: callback уже отвечен.",
+                        method.callback_query_id, method.text
+                    )
+                    return True
+                fingerprints.stats['answers_skipped'] += 1
+                logger.debug("Повторный ответ на callback %s пропущен.", method.callback_query_id)
+                return True
+            fingerprints.mark_answered(method.callback_query_id)
+            return await make_request(bot, method)
+
+        if not isinstance(method, (EditMessageText, EditMessageReplyMarkup)):
+            result = await make_request(bot, method)
+            if isinstance(method, SendMessage) and isinstance(result, Message):
+                fingerprints.remember_message(result)
+            return result
+
+        target = self._target(method)
+        if target is None:
+            return await make_request(bot, method)
+
+        previous = fingerprints.get(*target)
+        markup = markup_fingerprint(method.reply_markup)
+        if isinstance(method, EditMessageText):
+            current = (text_fingerprint(method.text), markup)
+        else:
+            current = (previous[0] if previous else None, markup)
+
+        if previous == current:
+            fingerprints.stats['edits_skipped'] += 1
+            return True
+
+        try:
+            result = await make_request(bot, method)
+        except TelegramBadRequest as e:
+            if 'message is not modified' not in e.message:
+                raise
+            fingerprints.stats['not_modified'] += 1
+            result = True
+
+        if current[0] is not None:
+            fingerprints.remember(*target, *current)
+        return result
@@ -1,34 +1,43 @@
 import locale
 import logging
 import json
+import hashlib
 
 import aiohttp
 import asyncio
 
+from os import getenv
+from typing import Awaitable, Callable
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
 
 from utils.db.main import Database
+from utils.http_client import ScraperClient, CircuitOpenError, get_scraper_client
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("app.log", encoding="utf-8")
-    ]
-)
+logger = logging.getLogger(__name__)
+
 
 locale.setlocale(locale.LC_TIME, 'ru_RU.UTF-8')
 
 
 class Parser:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        horizon_days: int = None,
+        concurrency: int = None,
+        client: ScraperClient = None
+    ) -> None:
         self.url = 'https://pmkspo.ru/schedules/fulltime/'
         self._schedule_data: list[dict[str, dict[str, any]]] = []
-        self.ua = UserAgent()
+        self.client = client or get_scraper_client()
+
+        self.horizon_days = horizon_days or int(getenv('PARSER_HORIZON_DAYS', 7))
+        self.concurrency = concurrency or int(getenv('PARSER_CONCURRENCY', 4))
+        self.parse_workers = 2
+
+        self._digests: dict = {}
+        self.records = 0
 
     def extract_text_from_soup(self, soup_elem, default=None):
         """Общий метод для извлечения текста из элемента BeautifulSoup"""
@@ -71,29 +80,28 @@ class Parser:
 
 
 
-    def __get_date_numbers(self) -> list[str]:
-        """Возвращает список дат на неделю от текущего дня"""
+    def get_dates(self) -> list:
+        """Возвращает список дат на горизонт от текущего дня"""
         today = datetime.now()
-        return [(today + timedelta(days=i)).date() for i in range(7)]
+        return [(today + timedelta(days=i)).date() for i in range(self.horizon_days)]
 
-    async def __get_schedule(self, session: aiohttp.ClientSession, date: str) -> None:
-        """Получение и парсинг расписания для указанной даты"""
+    async def fetch_page(self, date) -> str | None:
+        """Загрузка страницы расписания для указанной даты"""
         url = self.url + date.strftime('%Y-%m-%d')
-        headers = {'User-Agent': self.ua.random}
-        
+
         try:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                text = await response.text()
-        except aiohttp.ClientError as e:
-            logging.error(f"Ошибка запроса для даты {date}: {e}")
-            return
+            return await self.client.get_text(url)
+        except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError) as e:
+            logger.error("Ошибка запроса для даты %s: %r", date, e)
+            return None
 
+    def parse_page(self, date, text: str) -> list[dict[str, dict[str, any]]]:
+        """Парсинг страницы расписания для указанной даты"""
         soup = BeautifulSoup(text, 'lxml')
 
         if "На эту дату нет расписания занятий." in soup.text:
-            logging.info(f"Для даты {date} отсутствует расписание.")
-            return
+            logger.info("Для даты %s отсутствует расписание.", date)
+            return []
 
         formation_elem = soup.find('div', class_='text-muted')
         formation = self.extract_text_from_soup(formation_elem.find('small') if formation_elem else None, None)
@@ -104,12 +112,13 @@ class Parser:
         alert = self.extract_text_from_soup(alert_elem, None)
 
         if alert == 'На эту дату нет расписания занятий':
-            logging.info(f"Для даты {date} отсутствует расписание.")
-            return
+            logger.info("Для даты %s отсутствует расписание.", date)
+            return []
 
+        batch = []
         for card in soup.find_all('div', class_='card-body'):
             group_name, start_at, subjects = self.parse_schedule_card(card)
-            self._schedule_data.append({
+            batch.append({
                 group_name: {
                     'formation': formation,
                     'date': date,
@@ -119,13 +128,95 @@ class Parser:
                     'subjects': subjects
                 }
             })
-            logging.info(f"Расписание для группы {group_name} на дату {date} успешно получено.")
+        logger.info("Расписание на дату %s получено, групп: %s.", date, len(batch))
+        return batch
+
+    async def _fetch_worker(self, dates: asyncio.Queue, pages: asyncio.Queue) -> None:
+        """Берёт даты из очереди и передаёт загруженные страницы дальше"""
+        while True:
+            try:
+                date = dates.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            text = await self.fetch_page(date)
+            if text is not None:
+                await pages.put((date, text))
+
+    async def _parse_worker(self, pages: asyncio.Queue, batches: asyncio.Queue) -> None:
+        """Разбирает страницы в отдельном потоке, чтобы не блокировать event loop"""
+        while (item := await pages.get()) is not None:
+            date, text = item
+            batch = await asyncio.to_thread(self.parse_page, date, text)
+            if batch:
+                await batches.put((date, batch))
+
+    async def _write_worker(self, batches: asyncio.Queue, sink: Callable[[list], Awaitable[None]]) -> None:
+        """Передаёт готовые батчи по датам в sink по мере готовности"""
+        while (item := await batches.get()) is not None:
+            date, batch = item
+            await sink(batch)
+
+            rows = sorted(json.dumps(data, default=str, sort_keys=True) for data in batch)
+            self._digests[date] = hashlib.sha256('\n'.join(rows).encode()).hexdigest()
+            self.records += len(batch)
+
+    async def run_pipeline(self, sink: Callable[[list], Awaitable[None]]) -> None:
+        """
+        Потоковая обработка: загрузчики -> очередь страниц -> парсеры ->
+        очередь батчей -> запись. Каждая дата отдаётся в sink сразу после разбора,
+        в памяти одновременно находится не больше нескольких страниц.
+        """
+        dates: asyncio.Queue = asyncio.Queue()
+        for date in self.get_dates():
+            dates.put_nowait(date)
+
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        batches: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+
+        async def fetch_stage() -> None:
+            await asyncio.gather(*[
+                self._fetch_worker(dates, pages) for _ in range(self.concurrency)
+            ])
+            for _ in range(self.parse_workers):
+                await pages.put(None)
+
+        async def parse_stage() -> None:
+            await asyncio.gather(*[
+                self._parse_worker(pages, batches) for _ in range(self.parse_workers)
+            ])
+            await batches.put(None)
+
+        stages = [
+            asyncio.create_task(fetch_stage()),
+            asyncio.create_task(parse_stage()),
+            asyncio.create_task(self._write_worker(batches, sink))
+        ]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            # При ошибке одной стадии останавливаем остальные, чтобы они не зависли на очередях
+            for stage in stages:
+                stage.cancel()
 
     async def get_schedule(self) -> None:
-        """Получение расписания для недели"""
-        async with aiohttp.ClientSession() as session:
-            tasks = [self.__get_schedule(session, date) for date in self.__get_date_numbers()]
-            await asyncio.gather(*tasks)
+        """Получение расписания на весь горизонт в память"""
+        async def collect(batch: list) -> None:
+            self._schedule_data.extend(batch)
+
+        await self.run_pipeline(collect)
+
+    async def stream_db_data(self, db: Database) -> None:
+        """Получение расписания с записью в БД по мере готовности каждой даты"""
+        async def write(batch: list) -> None:
+            await db.add_schedule(data=batch, refresh=False)
+
+        try:
+            await self.run_pipeline(write)
+        finally:
+            if self.records:
+                await db.clear_cache_schedule()
+        logger.info("Данные расписания сохранены в БД, количество записей: %s.", self.records)
 
     def print_data(self) -> None:
         """Вывод данных расписания в формате JSON"""
@@ -135,9 +226,18 @@ class Parser:
         """Возвращает данные расписания в формате списка"""
         return self._schedule_data
 
+    def get_date_digests(self) -> dict[str, str]:
+        """Возвращает отпечатки полученных данных по датам"""
+        return {date.isoformat(): digest for date, digest in sorted(self._digests.items())}
+
+    def get_digest(self) -> str:
+        """Возвращает отпечаток полученных данных для определения изменений"""
+        digests = [self._digests[date] for date in sorted(self._digests)]
+        return hashlib.sha256('\n'.join(digests).encode()).hexdigest()
+
     async def save_db_data(self, db: Database) -> None:
         """Сохраняет расписание в базу данных"""
         if self._schedule_data:
             await db.add_schedule(data=self._schedule_data)
-            logging.info(f"Данные расписания сохранены в БД, количество записей: {len(self._schedule_data)}.")
-            self._schedule_data.clear()
\ No newline at end of file
+            logger.info("Данные расписания сохранены в БД, количество записей: %s.", len(self._schedule_data))
+            self._schedule_data.clear()
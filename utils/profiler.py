@@ -0,0 +1,127 @@
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerBusyError(Exception):
+    """
+    Профилирование уже запущено.
+    """
+
+
+class LoopProfiler:
+    """
+    Профилирует поток цикла событий с помощью cProfile в течение заданного времени.
+    Все обработчики, запросы asyncpg и парсинг в этом потоке попадают в профиль.
+    """
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def run(self, seconds: float, top: int = 20) -> tuple[str, bytes]:
+        """
+        Возвращает сводку самых затратных функций и файл профиля (.prof).
+        """
+        if self.running:
+            raise ProfilerBusyError('Профилирование уже запущено.')
+
+        async with self._lock:
+            profile = cProfile.Profile()
+            logger.info("Профилирование на %s с запущено.", seconds)
+            profile.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profile.disable()
+            logger.info("Профилирование завершено.")
+
+        return await asyncio.to_thread(self._export, profile, top)
+
+    @staticmethod
+    def _export(profile: cProfile.Profile, top: int) -> tuple[str, bytes]:
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.strip_dirs().sort_stats(pstats.SortKey.TIME).print_stats(top)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'profile.prof'
+            profile.dump_stats(path)
+            return stream.getvalue(), path.read_bytes()
+
+
+class LoopLagWatchdog:
+    """
+    Следит за задержками цикла событий. Цикл раз в interval секунд отмечает
+    heartbeat; отдельный поток, заметив, что отметки нет дольше threshold
+    секунд, пишет в лог стек потока цикла — то, что его сейчас блокирует.
+    """
+    def __init__(self, threshold: float = 0.5, interval: float = 0.1) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - expected)
+            self._heartbeat = now
+
+    def _watch(self) -> None:
+        reported = False
+        while not self._stop.wait(self.interval):
+            blocked = time.monotonic() - self._heartbeat
+            if blocked < self.threshold:
+                reported = False
+                continue
+            if reported:
+                continue
+            # Один раз за каждую остановку цикла
+            reported = True
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = ''.join(traceback.format_stack(frame)) if frame else 'стек недоступен'
+            logger.warning("Цикл событий заблокирован %.2f с:\n%s", blocked, stack)
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._beat())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self._stop.set()
+        await asyncio.to_thread(self._thread.join)
+
+    def info(self) -> dict:
+        return {'max_lag': self.max_lag, 'stalls': self.stalls, 'threshold': self.threshold}
@@ -0,0 +1,181 @@
+import logging
+import random
+from datetime import datetime, timedelta
+from os import getenv
+from typing import Dict, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.date import DateTrigger
+
+from utils.db.main import Database
+from utils.db.settings_manager import PARSER_MODE_CHANNEL
+from utils.ingest import IngestCoordinator
+
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveParserScheduler:
+    """
+    Планирует запуски парсера по истории изменений расписания.
+
+    По прошлым запускам оценивается, в какие часы суток страница обычно
+    меняется. В такие часы парсер запускается чаще, в остальное время реже.
+    Если данные подряд не меняются, интервал растёт. К интервалу
+    добавляется случайный разброс. Администратор может задать интервал вручную.
+    """
+    JOB_ID = 'parser'
+    # Настройка в БД с ручным интервалом: её задаёт администратор из любого процесса
+    OVERRIDE_SETTING = 'parser_override'
+    HOT_THRESHOLD = 0.3
+    BACKOFF = 1.5
+    JITTER = 0.1
+
+    def __init__(
+        self,
+        scheduler: AsyncIOScheduler,
+        db: Database,
+        ingest: IngestCoordinator
+    ) -> None:
+        self.scheduler = scheduler
+        self.db = db
+        self.ingest = ingest
+
+        self.min_interval = timedelta(minutes=int(getenv('PARSER_MIN_INTERVAL', 15)))
+        self.max_interval = timedelta(minutes=int(getenv('PARSER_MAX_INTERVAL', 240)))
+        self.default_interval = timedelta(hours=2)
+
+        self.override: Optional[timedelta] = None
+        self.unchanged_streak = 0
+        self.hour_scores: Dict[int, float] = {}
+        self.next_run: Optional[datetime] = None
+
+    async def start(self) -> None:
+        """
+        Загружает историю запусков и планирует первый запуск.
+        """
+        try:
+            await self.load_history()
+        except Exception as e:
+            logger.error("Не удалось загрузить историю запусков парсера: %s", e)
+        try:
+            self.override = await self.get_saved_override(self.db)
+        except Exception as e:
+            logger.error("Не удалось загрузить режим парсера: %s", e)
+        self.schedule_next()
+
+    async def load_history(self) -> None:
+        """
+        Оценивает вероятность изменений по часам суток (со сглаживанием).
+        """
+        self.hour_scores = {
+            record['hour']: (record['changes'] + 0.5) / (record['runs'] + 2)
+            for record in await self.db.get_parser_change_hours()
+        }
+
+    def is_hot(self, hour: int) -> bool:
+        return self.hour_scores.get(hour, 0) >= self.HOT_THRESHOLD
+
+    def next_interval(self, now: datetime) -> timedelta:
+        """
+        Вычисляет интервал до следующего запуска.
+        """
+        if self.override is not None:
+            # Интервал из БД тоже ограничивается: слишком частый запуск нагружает сайт
+            return min(max(self.override, self.min_interval), self.max_interval)
+
+        if not self.hour_scores:
+            interval = self.default_interval
+        else:
+            # Чем выше вероятность изменений в этот час, тем ближе интервал к минимальному
+            score = min(self.hour_scores.get(now.hour, 0) / self.HOT_THRESHOLD, 1)
+            interval = self.max_interval - (self.max_interval - self.min_interval) * score
+            if not self.is_hot(now.hour):
+                interval *= self.BACKOFF ** self.unchanged_streak
+
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        return interval * random.uniform(1 - self.JITTER, 1 + self.JITTER)
+
+    def next_hot_hour(self, now: datetime) -> Optional[datetime]:
+        """
+        Возвращает начало ближайшего «горячего» часа после текущего.
+        """
+        start = now.replace(minute=0, second=0, microsecond=0)
+        for i in range(1, 25):
+            moment = start + timedelta(hours=i)
+            if self.is_hot(moment.hour):
+                return moment
+        return None
+
+    def schedule_next(self) -> datetime:
+        now = datetime.now()
+        run_at = now + self.next_interval(now)
+
+        if self.override is None:
+            hot = self.next_hot_hour(now)
+            if hot is not None and hot < run_at:
+                run_at = hot + timedelta(seconds=random.uniform(0, 60))
+
+        self.next_run = run_at
+        # Опоздавший запуск не пропускается: иначе следующий не будет запланирован
+        self.scheduler.add_job(
+            self.run, DateTrigger(run_date=run_at),
+            id=self.JOB_ID, replace_existing=True,
+            misfire_grace_time=None, coalesce=True
+        )
+        logger.info("Следующий запуск парсера: %s.", format(run_at, '%d.%m %H:%M'))
+        return run_at
+
+    @classmethod
+    async def get_saved_override(cls, db: Database) -> Optional[timedelta]:
+        """
+        Возвращает ручной интервал, сохранённый в БД (None — адаптивный режим).
+        """
+        value = await db.get_setting(cls.OVERRIDE_SETTING)
+        return timedelta(minutes=int(value)) if value else None
+
+    @classmethod
+    async def save_override(cls, db: Database, minutes: Optional[int]) -> None:
+        """
+        Сохраняет ручной интервал в БД и оповещает процесс-лидер.
+        """
+        await db.set_setting(cls.OVERRIDE_SETTING, str(minutes) if minutes else None)
+        await db.notify(PARSER_MODE_CHANNEL)
+
+    async def reload_override(self) -> None:
+        """
+        Применяет режим, сохранённый другим процессом.
+        """
+        override = await self.get_saved_override(self.db)
+        if override != self.override:
+            self.set_override(int(override.total_seconds() // 60) if override else None)
+
+    def set_override(self, minutes: Optional[int]) -> datetime:
+        """
+        Задаёт фиксированный интервал в минутах (None — адаптивный режим).
+        """
+        self.override = timedelta(minutes=minutes) if minutes else None
+        logger.info("Режим парсера изменён: %s.", minutes or 'авто')
+        return self.schedule_next()
+
+    async def run(self) -> None:
+        try:
+            result = await self.ingest.run('scheduler')
+            if result.status == 'ok':
+                self.unchanged_streak = 0 if result.changed else self.unchanged_streak + 1
+            await self.load_history()
+        except Exception as e:
+            logger.error("Ошибка адаптивного планировщика: %s", e, exc_info=True)
+        finally:
+            self.schedule_next()
+
+    def describe(self) -> str:
+        hot_hours = sorted(hour for hour in self.hour_scores if self.is_hot(hour))
+        mode = f'каждые {int(self.override.total_seconds() // 60)} мин' if self.override else 'авто'
+        next_run = f'{self.next_run:%d.%m %H:%M}' if self.next_run else '—'
+        return (
+            f'Режим: {mode}\n'
+            f'Следующий запуск: {next_run}\n'
+            f'Без изменений подряд: {self.unchanged_streak}\n'
+            f'Часы изменений: {", ".join(map(str, hot_hours)) or "нет данных"}'
+        )
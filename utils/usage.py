@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from utils.db.main import Database
+
+
+logger = logging.getLogger(__name__)
+
+
+class UsageTracker:
+    """
+    Счётчики использования в памяти: запросы по (минута, группа, дата, действие)
+    и последнее время активности пользователей. Раз в interval секунд
+    накопленное пишется в БД одним COPY.
+    """
+    def __init__(self, db: Database, interval: float = 60) -> None:
+        self.db = db
+        self.interval = interval
+        self.counters: Counter = Counter()
+        self.last_seen: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, user_id: int, action: str, group_name: Optional[str] = None, day: Optional[date] = None) -> None:
+        now = datetime.now()
+        self.counters[(now.replace(second=0, microsecond=0), group_name, day, action)] += 1
+        self.last_seen[user_id] = now
+
+    async def flush(self) -> None:
+        if not self.counters and not self.last_seen:
+            return
+        counters, self.counters = self.counters, Counter()
+        last_seen, self.last_seen = self.last_seen, {}
+        try:
+            await self.db.write_usage([(*key, count) for key, count in counters.items()], last_seen)
+        except Exception as e:
+            # Не теряем данные: возвращаем их к новым счётчикам
+            logger.error("Не удалось записать статистику использования: %s", e)
+            self.counters.update(counters)
+            for user_id, seen in last_seen.items():
+                self.last_seen[user_id] = max(seen, self.last_seen.get(user_id, seen))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
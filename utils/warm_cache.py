@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import os
+import pickle
+import struct
+import time
+import zlib
+from os import getenv
+from pathlib import Path
+from typing import Any, Optional
+
+from keyboards.builders import keyboard_cache
+from utils.db.cache import cached_methods
+from utils.db.main import Database
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PMKC'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('>4sH')
+
+
+def _plain(value: Any) -> Any:
+    """
+    Переводит записи asyncpg (не сериализуются pickle) в обычные dict.
+    """
+    if isinstance(value, (list, tuple)):
+        return type(value)(_plain(item) for item in value)
+    if hasattr(value, 'items') and not isinstance(value, dict):
+        return dict(value.items())
+    return value
+
+
+def _write(path: Path, payload: dict) -> None:
+    data = HEADER.pack(MAGIC, FORMAT_VERSION) + zlib.compress(
+        pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    )
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _read(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    data = path.read_bytes()
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        logger.warning("Файл кэша %s другого формата, пропускаем.", path)
+        return None
+    return pickle.loads(zlib.decompress(data[HEADER.size:]))
+
+
+def cache_path(worker: Optional[int] = None) -> Path:
+    """
+    Путь к файлу кэша; у каждого процесса-обработчика свой файл.
+    """
+    path = Path(getenv('WARM_CACHE_FILE', 'cache.bin'))
+    if worker is not None:
+        path = path.with_name(f'{path.stem}.{worker}{path.suffix}')
+    return path
+
+
+async def save_warm_cache(db: Database, path: Path = None) -> None:
+    """
+    Сохраняет горячий кэш на диск при штатной остановке.
+    """
+    path = path or cache_path()
+    try:
+        payload = {
+            'saved_at': time.time(),
+            'data_version': await db.get_data_version(),
+            'schedule_version': db.data_version,
+            'snapshot': db.export_snapshot(),
+            'caches': {
+                name: [(key, _plain(value), ttl) for key, value, ttl in method.cache_dump()]
+                for name, method in cached_methods(db).items()
+            },
+            'keyboards': keyboard_cache.dump()
+        }
+        await asyncio.to_thread(_write, path, payload)
+        logger.info("Кэш сохранён в %s.", path)
+    except Exception as e:
+        logger.error("Не удалось сохранить кэш: %s", e)
+
+
+async def load_warm_cache(db: Database, path: Path = None) -> bool:
+    """
+    Загружает кэш, сохранённый при прошлой остановке. Данные расписания
+    используются, только если версия данных в БД не изменилась; кэш
+    пользователей — только если остановка была не дольше WARM_CACHE_USER_MAX_AGE.
+    Возвращает True, если снимок расписания восстановлен.
+    """
+    path = path or cache_path()
+    try:
+        payload = await asyncio.to_thread(_read, path)
+    except Exception as e:
+        logger.warning("Не удалось прочитать файл кэша %s: %s", path, e)
+        return False
+    if payload is None:
+        return False
+
+    elapsed = max(time.time() - payload['saved_at'], 0)
+    methods = cached_methods(db)
+
+    # Пока бот стоял, пользователей могли менять другие процессы или прямо в БД:
+    # версии у этих данных нет, поэтому кэш берём только после короткой остановки
+    restored = 0
+    if elapsed <= float(getenv('WARM_CACHE_USER_MAX_AGE', 10)):
+        restored += sum(
+            methods[name].cache_load(items, elapsed)
+            for name, items in payload['caches'].items()
+            if name in methods and not name.startswith('_fetch_')
+        )
+    else:
+        logger.info("Остановка длилась %.0f с, кэш пользователей не используется.", elapsed)
+
+    if payload['snapshot'] is None or payload['data_version'] != await db.get_data_version():
+        logger.info("Версия расписания в БД изменилась, кэш расписания не используется.")
+        return False
+
+    db.install_snapshot(payload['snapshot'])
+    db.data_version = payload['schedule_version']
+    keyboard_cache.load(payload['keyboards'])
+    restored += sum(
+        methods[name].cache_load(items, elapsed)
+        for name, items in payload['caches'].items()
+        if name in methods and name.startswith('_fetch_')
+    )
+
+    logger.info("Кэш восстановлен из %s, записей: %s.", path, restored)
+    return True